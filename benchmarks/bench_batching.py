@@ -0,0 +1,114 @@
+# benchmarks/bench_batching.py
+"""Throughput and latency of micro-batched matching against per-request matching.
+
+Concurrent client threads send bursts of match requests, either straight to
+find_matches or through a MicroBatcher with each batching window:
+
+    python benchmarks/bench_batching.py --students 100000 --clients 32 --wait-ms 0 1 2 5 10
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from bench_matching import build_system, make_roster
+from src.web.batcher import MicroBatcher
+
+
+def run_clients(match, queries, n_clients, requests_per_client):
+    """Each client thread sends its requests back to back; returns (seconds, latencies)"""
+    latencies = [[] for _ in range(n_clients)]
+    start_barrier = threading.Barrier(n_clients + 1)
+
+    def client(i):
+        rng = np.random.default_rng(i)
+        start_barrier.wait()
+        for _ in range(requests_per_client):
+            query = queries[rng.integers(len(queries))]
+            start = time.perf_counter()
+            match(query)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.concatenate([np.asarray(l) for l in latencies])
+
+
+def summarize(label, seconds, latencies, **extra):
+    return dict({
+        'mode': label,
+        'requests_per_s': len(latencies) / seconds,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }, **extra)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=20, help="requests per client")
+    parser.add_argument('--wait-ms', type=float, nargs='+', default=[0, 1, 2, 5, 10])
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    roster = make_roster(args.students)
+    system = build_system(roster, train_size=args.train_size, epochs=args.epochs)
+    queries = roster.sample(min(1000, args.students), random_state=1).to_dict('records')
+    for query in queries:
+        query['Child_Age'] = int(query['Child_Age'])
+
+    results = {'n_students': args.students, 'clients': args.clients,
+               'cpu_count': os.cpu_count(), 'runs': []}
+    seconds, latencies = run_clients(
+        lambda query: system.find_matches(query, top_n=args.top_n),
+        queries, args.clients, args.requests
+    )
+    results['runs'].append(summarize('unbatched', seconds, latencies))
+
+    for wait_ms in args.wait_ms:
+        batcher = MicroBatcher(max_batch_size=args.batch_size, max_wait_ms=wait_ms)
+        seconds, latencies = run_clients(
+            lambda query: batcher.match(system, query, top_n=args.top_n),
+            queries, args.clients, args.requests
+        )
+        stats = batcher.stats()
+        batcher.close()
+        results['runs'].append(summarize(
+            'batched', seconds, latencies, max_wait_ms=wait_ms,
+            max_batch_size=args.batch_size, mean_batch_size=stats['mean_batch_size']
+        ))
+
+    for run in results['runs']:
+        print(f"{run['mode']:>9} wait={run.get('max_wait_ms', '-')}ms: "
+              f"{run['requests_per_s']:.0f} req/s, p50 {run['p50_ms']:.1f}ms, "
+              f"p99 {run['p99_ms']:.1f}ms", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_filtering.py
+"""Candidate counts and matching latency with hard-constraint prefiltering.
+
+    python benchmarks/bench_filtering.py --students 1000000 --output filtering.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from bench_matching import build_system, make_roster, summarize, time_call
+
+CONSTRAINT_SETS = {
+    'none': {},
+    'same_region': {'same_region': True},
+    'max_age_gap_1': {'max_age_gap': 1},
+    'min_overlap_slots_1': {'min_overlap_slots': 1},
+    'min_overlap_slots_3': {'min_overlap_slots': 3},
+    'combined': {'same_region': True, 'max_age_gap': 2, 'min_overlap_slots': 1},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    roster = make_roster(args.students)
+    system = build_system(roster, train_size=args.train_size, epochs=args.epochs)
+    build_seconds, candidate_filter = time_call(lambda: system.candidate_filter)
+
+    queries = roster.sample(args.queries, random_state=1).to_dict('records')
+    for query in queries:
+        query['Child_Age'] = int(query['Child_Age'])
+
+    results = {
+        'n_students': args.students,
+        'n_queries': args.queries,
+        'filter_build_seconds': build_seconds,
+        'runs': [],
+    }
+    for name, constraints in CONSTRAINT_SETS.items():
+        counts, filter_times, match_times = [], [], []
+        for query in queries:
+            if constraints:
+                seconds, candidates = time_call(candidate_filter.candidates, query, **constraints)
+                counts.append(len(candidates))
+                filter_times.append(seconds)
+            else:
+                counts.append(args.students)
+            match_times.append(time_call(
+                system.find_matches, query, top_n=args.top_n, constraints=constraints
+            )[0])
+        results['runs'].append({
+            'constraints': name,
+            'mean_candidates': float(np.mean(counts)),
+            'candidate_fraction': float(np.mean(counts) / args.students),
+            'filter': summarize(filter_times) if filter_times else None,
+            'end_to_end': summarize(match_times),
+        })
+        print(f"{name:>20}: {np.mean(counts):>10.0f} candidates, "
+              f"p50 {results['runs'][-1]['end_to_end']['p50_ms']:.2f}ms", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
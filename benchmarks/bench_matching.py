@@ -0,0 +1,198 @@
+# benchmarks/bench_matching.py
+"""Per-stage matching latency, throughput and peak RSS across roster sizes.
+
+Prints (or writes) one JSON document so runs can be compared between versions:
+
+    python benchmarks/bench_matching.py --sizes 1000 10000 100000 --output bench.json
+
+With --candidate-pool (e.g. --index-backend ivf --candidate-pool 200), each
+run also reports recall@k of the final matches against scoring every student.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.data.data_generator import generate_sample_data
+from src.models.matching_system import StudentMatchingSystem
+from src.models.retrieval import top_k_indices
+
+
+def make_roster(n_students, seed=0):
+    """Synthetic roster drawn from the sample generator's distributions"""
+    return generate_sample_data(n_samples=n_students, seed=seed)
+
+
+def build_system(roster, train_size=2000, epochs=5, **system_kwargs):
+    """Train on a sample of the roster, then add everyone else without retraining"""
+    system = StudentMatchingSystem(**system_kwargs)
+    system.fit(roster.iloc[:train_size], epochs=epochs)
+    if len(roster) > train_size:
+        system.add_students(roster.iloc[train_size:])
+    return system
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(samples):
+    samples = np.asarray(samples)
+    return {
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000),
+        'mean_ms': float(samples.mean() * 1000),
+        'throughput_per_s': float(1.0 / samples.mean()) if samples.mean() > 0 else None,
+    }
+
+
+def time_call(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def match_ids(system, queries, k):
+    return [[match['student_id'] for match in system.find_matches(query, top_n=k, fields=('student_id',))]
+            for query in queries]
+
+
+def end_to_end_recall(system, queries, k=10):
+    """Mean fraction of the top-k matches from scoring every student that
+    matching through the candidate pool (shortlist, then penalty rerank) finds"""
+    found = match_ids(system, queries, k)
+    candidate_pool, system.candidate_pool = system.candidate_pool, None
+    try:
+        expected = match_ids(system, queries, k)
+    finally:
+        system.candidate_pool = candidate_pool
+    hits = [len(set(f) & set(e)) / max(len(e), 1) for f, e in zip(found, expected)]
+    return float(np.mean(hits))
+
+
+def bench_size(n_students, n_queries=50, top_n=5, keras=True, seed=0, recall_k=10, **build_kwargs):
+    """Time each matching stage for n_queries students against a roster"""
+    roster = make_roster(n_students, seed=seed)
+    setup_seconds, system = time_call(build_system, roster, **build_kwargs)
+
+    rng = np.random.default_rng(seed + 1)
+    queries = roster.iloc[rng.integers(0, n_students, n_queries)].to_dict('records')
+    for query in queries:
+        query['Child_Age'] = int(query['Child_Age'])
+
+    timings = {stage: [] for stage in (
+        'preprocess_dataframe', 'preprocess', 'encode_keras', 'encode',
+        'similarity', 'penalties', 'top_k', 'serialize', 'end_to_end'
+    )}
+    if not keras or system.autoencoder is None:
+        del timings['encode_keras']
+
+    population = system.population
+    for query in queries:
+        seconds, processed_frame = time_call(
+            system.preprocessor.preprocess_data, pd.DataFrame([query])
+        )
+        timings['preprocess_dataframe'].append(seconds)
+        if 'encode_keras' in timings:
+            features = processed_frame[system.feature_columns].values
+            timings['encode_keras'].append(time_call(system.autoencoder.encode, features)[0])
+
+        seconds, processed = time_call(system.preprocessor.transform_record, query)
+        timings['preprocess'].append(seconds)
+        seconds, encoded = time_call(system.encoder.encode, processed[None, :])
+        timings['encode'].append(seconds)
+        seconds, similarities = time_call(population.index.similarities, encoded)
+        timings['similarity'].append(seconds)
+        seconds, penalties = time_call(population.penalty_engine.calculate, query)
+        timings['penalties'].append(seconds)
+        adjusted = similarities[0] - penalties
+        seconds, top = time_call(top_k_indices, adjusted, top_n)
+        timings['top_k'].append(seconds)
+
+        def serialize():
+            matches = [system._build_match(population, query, idx, adjusted[idx], similarities[0][idx],
+                                           penalties[idx])
+                       for idx in top]
+            return json.dumps(matches)
+        timings['serialize'].append(time_call(serialize)[0])
+
+        timings['end_to_end'].append(time_call(system.find_matches, query, top_n=top_n)[0])
+
+    recall = None
+    if system.candidate_pool is not None:
+        # Raw index top-k against exact cosine, and the final matches against
+        # scoring the whole population
+        recall = {
+            'k': recall_k,
+            'index': system.index_recall(k=recall_k),
+            'end_to_end': end_to_end_recall(system, queries, k=recall_k),
+        }
+
+    return {
+        'n_students': n_students,
+        'n_queries': n_queries,
+        'setup_seconds': setup_seconds,
+        'stages': {stage: summarize(samples) for stage, samples in timings.items()},
+        'recall': recall,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--index-backend', default='exact')
+    parser.add_argument('--candidate-pool', type=int, default=None,
+                        help="rerank only this many index candidates; also reports recall@k against full scoring")
+    parser.add_argument('--recall-k', type=int, default=10)
+    parser.add_argument('--no-keras', action='store_true', help="skip timing Keras predict")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'runs': [],
+    }
+    for n_students in sorted(args.sizes):
+        run = bench_size(
+            n_students, n_queries=args.queries, top_n=args.top_n, keras=not args.no_keras,
+            recall_k=args.recall_k, train_size=args.train_size, epochs=args.epochs,
+            index_backend=args.index_backend, candidate_pool=args.candidate_pool
+        )
+        results['runs'].append(run)
+        recall = run['recall']
+        print(f"{n_students:>9} students: end-to-end p50 "
+              f"{run['stages']['end_to_end']['p50_ms']:.2f}ms"
+              + (f", recall@{recall['k']} {recall['end_to_end']:.3f} (index {recall['index']:.3f})" if recall else ""),
+              file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_pairing.py
+"""Objective and runtime of the cohort pairing solver across cohort sizes.
+
+Random pairs/groups are reported alongside as a baseline:
+
+    python benchmarks/bench_pairing.py --sizes 10000 100000 --group-size 2
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from bench_matching import build_system, make_roster, peak_rss_mb
+from src.models.pairing import mutual_scores, pair_cohort
+
+
+def random_objective(system, group_size, seed=0):
+    """Objective of a random split of the population into groups"""
+    population = system.population
+    n = len(population)
+    groups = np.random.default_rng(seed).permutation(n)[:n // group_size * group_size].reshape(-1, group_size)
+    a, b = np.triu_indices(group_size, 1)
+    return float(mutual_scores(population, groups[:, a].ravel(), groups[:, b].ravel()).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--group-size', type=int, default=2)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--candidates', type=int, default=64)
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = {'group_size': args.group_size, 'k': args.k, 'candidates': args.candidates, 'runs': []}
+    for n_students in args.sizes:
+        system = build_system(make_roster(n_students), train_size=args.train_size, epochs=args.epochs)
+        result = pair_cohort(system, group_size=args.group_size, k=args.k, n_candidates=args.candidates)
+        results['runs'].append({
+            'n_students': n_students,
+            'objective': result['objective'],
+            'greedy_objective': result['greedy_objective'],
+            'random_objective': random_objective(system, args.group_size),
+            'mean_pair_score': result['mean_pair_score'],
+            'n_edges': result['n_edges'],
+            'timings': result['timings'],
+            'peak_rss_mb': peak_rss_mb(),
+        })
+        run = results['runs'][-1]
+        print(f"{n_students:>8}: objective {run['objective']:.1f} (greedy {run['greedy_objective']:.1f}, "
+              f"random {run['random_objective']:.1f}) in {run['timings']['total_seconds']:.1f}s",
+              file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_preprocess.py
+"""Per-row cost of the DataFrame preprocessing path vs the compiled feature plan"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.data.data_generator import generate_sample_data
+from src.utils.preprocessing import DataPreprocessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=300, help="training roster size")
+    parser.add_argument('--repeat', type=int, default=2000, help="encodes per measurement")
+    args = parser.parse_args()
+
+    df = generate_sample_data(n_samples=args.rows)
+    preprocessor = DataPreprocessor()
+    preprocessor.fit(df)
+    columns = preprocessor.feature_plan.columns
+    records = df.to_dict('records')
+
+    def dataframe_path(record):
+        processed = preprocessor.preprocess_data(pd.DataFrame([record]))
+        return processed[columns].values.astype(np.float32)[0]
+
+    # Both paths produce identical vectors (tests/test_preprocessing.py)
+    record = records[0]
+    for name, fn in [('dataframe', dataframe_path), ('feature_plan', preprocessor.transform_record)]:
+        n = max(args.repeat // 20, 1) if name == 'dataframe' else args.repeat
+        seconds = min(timeit.repeat(lambda: fn(record), number=n, repeat=3)) / n
+        print(f"{name:>12}: {seconds * 1e6:9.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# benchmarks/bench_serving.py
+"""Load test of the pre-fork server: requests per second and memory by worker count.
+
+Trains a model on a synthetic roster, then starts src/web/serve.py with each
+worker count and drives POST /match from several client processes:
+
+    python benchmarks/bench_serving.py --students 100000 --workers 1 2 4 8 --output serving.json
+
+Memory is the summed proportional set size (PSS) of the server processes,
+which counts shared pages once; it is only reported on Linux.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def prepare_artifacts(directory, n_students, train_size, epochs, seed=0):
+    """Write a roster CSV and matching artifacts the app will load instead of training"""
+    from bench_matching import build_system, make_roster
+    from src.utils.artifacts import file_sha256
+
+    roster = make_roster(n_students, seed=seed)
+    data_file = os.path.join(directory, 'students.csv')
+    roster.to_csv(data_file, index=False)
+    artifact_dir = os.path.join(directory, 'artifacts')
+    system = build_system(roster, train_size=train_size, epochs=epochs)
+    system.save(artifact_dir, data_hash=file_sha256(data_file))
+
+    queries = roster.sample(min(1000, n_students), random_state=seed).to_dict('records')
+    for query in queries:
+        query['Child_Age'] = int(query['Child_Age'])
+    return data_file, artifact_dir, queries
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def post_json(url, payload, timeout=30):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def wait_until_ready(url, process, log_file, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(log_file) as f:
+                raise RuntimeError(f"Server exited during startup:\n{f.read()}")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server did not start within {timeout}s")
+
+
+def server_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [pid] + [int(child) for child in f.read().split()]
+    except OSError:
+        return [pid]
+
+
+def pss_mb(pids):
+    """Summed proportional set size in MB, or None where /proc is unavailable"""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            return None
+    return total / 1024
+
+
+def client(url, queries, duration, seed):
+    """Post queries back to back for duration seconds; returns the latencies"""
+    rng = np.random.default_rng(seed)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        query = queries[rng.integers(len(queries))]
+        start = time.perf_counter()
+        post_json(url, query)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_workers(n_workers, data_file, artifact_dir, queries, clients, duration, warmup):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    log_file = os.path.join(os.path.dirname(data_file), f'server_{n_workers}.log')
+    env = dict(os.environ, MATCHING_DATA=data_file, MATCHING_ARTIFACTS=artifact_dir,
+               MATCH_CACHE_SIZE='0', LOG_LEVEL='WARNING', TF_CPP_MIN_LOG_LEVEL='3')
+    with open(log_file, 'w') as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(project_root, 'src', 'web', 'serve.py'),
+             '--workers', str(n_workers), '--port', str(port)],
+            env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        wait_until_ready(base_url + '/admin/status', process, log_file)
+        client(base_url + '/match', queries, warmup, seed=0)
+
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(clients) as pool:
+            results = pool.starmap(client, [
+                (base_url + '/match', queries, duration, seed) for seed in range(clients)
+            ])
+        memory = pss_mb(server_pids(process.pid))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    latencies = np.concatenate([np.asarray(r) for r in results])
+    return {
+        'workers': n_workers,
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / duration,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'server_pss_mb': memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8, help="concurrent client processes")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = {'n_students': args.students, 'clients': args.clients,
+               'cpu_count': os.cpu_count(), 'runs': []}
+    with tempfile.TemporaryDirectory() as directory:
+        data_file, artifact_dir, queries = prepare_artifacts(
+            directory, args.students, args.train_size, args.epochs
+        )
+        for n_workers in args.workers:
+            run = bench_workers(n_workers, data_file, artifact_dir, queries,
+                                args.clients, args.duration, args.warmup)
+            results['runs'].append(run)
+            print(f"{n_workers:>3} workers: {run['requests_per_s']:.0f} req/s, "
+                  f"p99 {run['p99_ms']:.1f}ms, PSS {run['server_pss_mb']} MB", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# benchmarks/bench_training.py
+"""Autoencoder training time and match quality across training configurations.
+
+Each configuration trains a matching system on the same roster (the others
+use fit()'s defaults: early stopping with patience 5 and halving the learning
+rate after 2 epochs without improvement). Reported per
+run: wall time per epoch, total training time, time to reach the baseline's
+best validation loss (within --tolerance), reconstruction loss on held-out
+students and the top-k overlap of its matches with the baseline's:
+
+    python benchmarks/bench_training.py --students 20000 --output training.json
+
+The baseline is also trained with another seed, which gives the loss and
+overlap to expect from retraining alone. A configuration fails when its
+held-out loss exceeds the worse of the two baselines' by more than
+--loss-tolerance (relative), or its overlap is more than --overlap-tolerance
+below the reseeded baseline's; the script then exits with status 1. fit()'s
+defaults should only change to configurations that pass.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import tensorflow as tf
+
+from bench_matching import make_roster
+from src.models.drift import reconstruction_errors
+from src.models.matching_system import StudentMatchingSystem
+
+CONFIGS = {
+    'baseline': {'epochs': 50, 'batch_size': 32, 'patience': None, 'lr_patience': None},
+    # The baseline with another seed: the overlap and loss spread to expect from retraining alone
+    'baseline_reseeded': {'epochs': 50, 'batch_size': 32, 'patience': None, 'lr_patience': None,
+                          'seed': 1},
+    'early_stopping': {'epochs': 50, 'batch_size': 32},
+    'auto_batch': {'epochs': 50, 'batch_size': 'auto'},
+    'auto_batch_xla': {'epochs': 50, 'batch_size': 'auto', 'jit_compile': True},
+}
+
+
+def time_to_loss(report, target):
+    """Seconds until the monitored loss first reached target, or None"""
+    elapsed = 0.0
+    for seconds, loss in zip(report['epoch_seconds'], report['losses']):
+        elapsed += seconds
+        if loss is not None and loss <= target:
+            return elapsed
+    return None
+
+
+def top_k_ids(system, queries, k):
+    return [[match['student_id'] for match in system.find_matches(query, top_n=k)] for query in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--holdout', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="target loss is the baseline's best loss times 1 + tolerance")
+    parser.add_argument('--loss-tolerance', type=float, default=0.05,
+                        help="allowed relative increase of the held-out loss over the baselines'")
+    parser.add_argument('--overlap-tolerance', type=float, default=0.05,
+                        help="allowed drop of the top-k overlap below the reseeded baseline's")
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    roster = make_roster(args.students + args.holdout)
+    train, holdout = roster.iloc[:args.students], roster.iloc[args.students:].reset_index(drop=True)
+    queries = train.sample(args.queries, random_state=1).to_dict('records')
+    for query in queries:
+        query['Child_Age'] = int(query['Child_Age'])
+
+    results = {'n_students': args.students, 'n_holdout': args.holdout, 'top_k': args.top_k,
+               'cpu_count': os.cpu_count(), 'runs': []}
+    baseline = None
+    references = ['baseline', 'baseline_reseeded']
+    for name in references + [name for name in args.configs if name not in references]:
+        options = dict(CONFIGS[name])
+        tf.keras.utils.set_random_seed(args.seed + options.pop('seed', 0))
+        system = StudentMatchingSystem()
+        start = time.perf_counter()
+        system.fit(train, **options)
+        fit_seconds = time.perf_counter() - start
+        report = system.autoencoder.training_report
+
+        processed = system.preprocessor.preprocess_data(holdout)[system.feature_columns].values
+        matches = top_k_ids(system, queries, args.top_k)
+        if baseline is None:
+            baseline = {'matches': matches, 'target_loss': report['best_loss'] * (1 + args.tolerance)}
+        overlap = np.mean([
+            len(set(a) & set(b)) / args.top_k for a, b in zip(matches, baseline['matches'])
+        ])
+        results['runs'].append({
+            'config': name,
+            'options': CONFIGS[name],
+            'batch_size': report['batch_size'],
+            'epochs': report['epochs'],
+            'mean_epoch_seconds': report['total_seconds'] / report['epochs'],
+            'training_seconds': report['total_seconds'],
+            'fit_seconds': fit_seconds,
+            'best_val_loss': report['best_loss'],
+            'time_to_target': time_to_loss(report, baseline['target_loss']),
+            'holdout_reconstruction_loss': float(reconstruction_errors(system.reconstructor, processed).mean()),
+            'top_k_overlap': float(overlap),
+        })
+        run = results['runs'][-1]
+        print(f"{name:>17}: {run['epochs']} epochs x {run['batch_size']} in {run['training_seconds']:.1f}s, "
+              f"val loss {run['best_val_loss']:.4f}, holdout {run['holdout_reconstruction_loss']:.4f}, "
+              f"top-{args.top_k} overlap {run['top_k_overlap']:.2f}", file=sys.stderr)
+    results['target_loss'] = baseline['target_loss']
+
+    # Quality gate against the spread between the two baseline seeds
+    runs = {run['config']: run for run in results['runs']}
+    reference_loss = max(runs[name]['holdout_reconstruction_loss'] for name in references)
+    reference_overlap = runs['baseline_reseeded']['top_k_overlap']
+    results['gate'] = {
+        'baseline_holdout_loss': runs['baseline']['holdout_reconstruction_loss'],
+        'reseeded_holdout_loss': runs['baseline_reseeded']['holdout_reconstruction_loss'],
+        'reseeded_top_k_overlap': reference_overlap,
+        'max_holdout_loss': reference_loss * (1 + args.loss_tolerance),
+        'min_top_k_overlap': reference_overlap - args.overlap_tolerance,
+    }
+    failures = []
+    for run in results['runs']:
+        run['failures'] = []
+        if run['config'] in references:
+            continue
+        if run['holdout_reconstruction_loss'] > results['gate']['max_holdout_loss']:
+            run['failures'].append(f"holdout loss {run['holdout_reconstruction_loss']:.4f} > "
+                                   f"{results['gate']['max_holdout_loss']:.4f}")
+        if run['top_k_overlap'] < results['gate']['min_top_k_overlap']:
+            run['failures'].append(f"top-{args.top_k} overlap {run['top_k_overlap']:.2f} < "
+                                   f"{results['gate']['min_top_k_overlap']:.2f}")
+        failures.extend(f"{run['config']}: {failure}" for failure in run['failures'])
+    print(f"Baseline holdout loss {results['gate']['baseline_holdout_loss']:.4f}, reseeded "
+          f"{results['gate']['reseeded_holdout_loss']:.4f} (overlap {reference_overlap:.2f})", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
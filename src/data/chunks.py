@@ -0,0 +1,21 @@
+# src/data/chunks.py
+import os
+
+import pandas as pd
+
+
+def iter_roster_chunks(path, chunk_size=100000):
+    """Read a roster CSV or Parquet file as DataFrames of at most chunk_size rows.
+
+    Each chunk has a fresh RangeIndex, so it can be preprocessed on its own.
+    """
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet rosters requires pyarrow") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield chunk.reset_index(drop=True)
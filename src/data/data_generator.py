@@ -1,111 +1,154 @@
 # src/data/data_generator.py
+import argparse
 import pandas as pd
 import numpy as np
-import random
 import string
 
-def generate_random_nickname():
-    """Generate a random 10-character nickname"""
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+NICKNAME_ALPHABET = np.array(list(string.ascii_letters + string.digits))
+NICKNAME_LENGTH = 10
 
-def generate_sample_data(n_samples=300, save_path=None):
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TIMES = ['Morning', 'Afternoon', 'Evening']
+
+INTERESTS = [
+    'Science',
+    'Coding/Game Design',
+    'Reading/Writing',
+    'Engineering',
+    'Art',
+    'Music',
+    'Math'
+]
+
+REGIONS = ['Western America', 'Central America', 'Eastern America']
+
+# Gender with 80% Male/Female distribution
+GENDERS = ['Male', 'Female', 'Other', 'Prefer not to say']
+GENDER_CUMULATIVE = [0.4, 0.8, 0.9]
+
+INTEREST_PROBABILITY = 0.3
+
+# Rows are drawn in blocks of this size, each from its own random stream,
+# so a seed gives the same roster however it is chunked
+SEED_BLOCK_SIZE = 65536
+
+
+def availability_probability(day, time):
+    """Chance that a student is available in a time slot"""
+    if day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
+        return {'Morning': 0.1, 'Afternoon': 0.2, 'Evening': 0.3}[time]
+    if day == 'Saturday':
+        return 0.5
+    # Sunday
+    return 0.3
+
+
+def _generate_chunk(n_samples, rng):
+    """Draw n_samples students column by column"""
+    data = {}
+
+    # Basic Information
+    letters = NICKNAME_ALPHABET[rng.integers(0, len(NICKNAME_ALPHABET), (n_samples, NICKNAME_LENGTH))]
+    data['Child_Nickname'] = np.ascontiguousarray(letters).view(f'<U{NICKNAME_LENGTH}').ravel()
+    data['Child_Age'] = rng.integers(3, 14, n_samples)
+    data['Child_Gender'] = np.array(GENDERS)[np.searchsorted(GENDER_CUMULATIVE, rng.random(n_samples), side='right')]
+    data['Child_Region'] = np.array(REGIONS)[rng.integers(0, len(REGIONS), n_samples)]
+
+    # Interests
+    selected = rng.random((n_samples, len(INTERESTS))) < INTEREST_PROBABILITY
+    for i, interest in enumerate(INTERESTS):
+        data[f'Interest_{interest.replace("/", "_")}'] = np.where(selected[:, i], 'Selected', 'Not selected')
+
+    # Available Times
+    slots = [(day, time) for day in DAYS for time in TIMES]
+    probabilities = np.array([availability_probability(day, time) for day, time in slots])
+    available = rng.random((n_samples, len(slots))) < probabilities
+    for i, (day, time) in enumerate(slots):
+        data[f'Available_Time_{day}_{time}'] = np.where(available[:, i], 'Available', 'Not available')
+
+    # Matching Preferences
+    data['Preference_Interaction_Outside_Class'] = np.array(['Yes', 'No', 'Decide Later'])[rng.integers(0, 3, n_samples)]
+    data['Preference_Overlapping_Time'] = np.array(['Important', 'Not Important', 'Neutral'])[rng.integers(0, 3, n_samples)]
+
+    # 80% Important for Age and Gender preferences
+    for pref in ['Similar_Age', 'Same_Gender']:
+        important = rng.random(n_samples) < 0.8
+        other = np.array(['Not Important', 'Neutral'])[rng.integers(0, 2, n_samples)]
+        data[f'Preference_{pref}'] = np.where(important, 'Important', other)
+
+    return pd.DataFrame(data)
+
+
+def _iter_blocks(n_samples, seed):
+    """Draw the roster in SEED_BLOCK_SIZE blocks, block i from child i of the seed's SeedSequence"""
+    root = np.random.SeedSequence(seed)
+    for i, start in enumerate(range(0, max(n_samples, 1), SEED_BLOCK_SIZE)):
+        rng = np.random.default_rng(np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (i,)))
+        yield _generate_chunk(min(SEED_BLOCK_SIZE, n_samples - start), rng)
+
+
+def iter_sample_data(n_samples, chunk_size=100000, seed=None):
+    """Yield sample student data in DataFrames of at most chunk_size rows.
+
+    Output is reproducible for a given seed, whatever the chunk_size, and
+    matches generate_sample_data(n_samples, seed=seed).
+    """
+    rest = None
+    for block in _iter_blocks(n_samples, seed):
+        block = block if rest is None else pd.concat([rest, block], ignore_index=True)
+        start = 0
+        while len(block) - start >= chunk_size:
+            yield block.iloc[start:start + chunk_size].reset_index(drop=True)
+            start += chunk_size
+        rest = block.iloc[start:]
+    if rest is not None and len(rest):
+        yield rest.reset_index(drop=True)
+
+
+def write_sample_data(path, n_samples, chunk_size=100000, seed=None):
+    """Stream sample data to a CSV or Parquet file without holding it all in memory"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet files requires pyarrow")
+        writer = None
+        try:
+            for chunk in iter_sample_data(n_samples, chunk_size, seed):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, chunk in enumerate(iter_sample_data(n_samples, chunk_size, seed)):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    print(f"Data saved to {path}")
+
+
+def generate_sample_data(n_samples=300, save_path=None, seed=None):
     """Generate sample student data based on specified criteria"""
-    
-    # Initialize empty list for data
-    data = []
-    
-    # Define time slots
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    times = ['Morning', 'Afternoon', 'Evening']
-    
-    # Define interests
-    interests = [
-        'Science', 
-        'Coding/Game Design', 
-        'Reading/Writing', 
-        'Engineering',
-        'Art', 
-        'Music', 
-        'Math'
-    ]
-    
-    for _ in range(n_samples):
-        student_data = {}
-        
-        # Basic Information
-        student_data['Child_Nickname'] = generate_random_nickname()
-        student_data['Child_Age'] = random.randint(3, 13)
-        
-        # Gender with 80% Male/Female distribution
-        gender_choice = random.random()
-        if gender_choice < 0.4:
-            student_data['Child_Gender'] = 'Male'
-        elif gender_choice < 0.8:
-            student_data['Child_Gender'] = 'Female'
-        elif gender_choice < 0.9:
-            student_data['Child_Gender'] = 'Other'
-        else:
-            student_data['Child_Gender'] = 'Prefer not to say'
-        
-        # Region
-        student_data['Child_Region'] = random.choice([
-            'Western America', 'Central America', 'Eastern America'
-        ])
-        
-        # Interests
-        print("\nDebug: Generating interest data")
-        for interest in interests:
-            column_name = f'Interest_{interest.replace("/", "_")}'
-            value = random.choices(['Selected', 'Not selected'], weights=[0.3, 0.7], k=1)[0]
-            student_data[column_name] = value
-            print(f"Interest: {interest}")
-            print(f"Column name: {column_name}")
-            print(f"Value: {value}")
-        
-        # Available Times
-        for day in days:
-            for time in times:
-                available_prob = random.random()
-                is_available = False
-                
-                if day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-                    if time == 'Morning':
-                        is_available = available_prob < 0.1  # 10% chance
-                    elif time == 'Afternoon':
-                        is_available = available_prob < 0.2  # 20% chance
-                    else:  # Evening
-                        is_available = available_prob < 0.3  # 30% chance
-                elif day == 'Saturday':
-                    is_available = random.choice([True, False])  # 50% chance
-                else:  # Sunday
-                    is_available = available_prob < 0.3  # 30% chance for all slots
-                
-                student_data[f'Available_Time_{day}_{time}'] = 'Available' if is_available else 'Not available'
-        
-        # Matching Preferences
-        student_data['Preference_Interaction_Outside_Class'] = random.choice(['Yes', 'No', 'Decide Later'])
-        
-        student_data['Preference_Overlapping_Time'] = random.choice(['Important', 'Not Important', 'Neutral'])
-        
-        # 80% Important for Age and Gender preferences
-        for pref in ['Similar_Age', 'Same_Gender']:
-            if random.random() < 0.8:
-                student_data[f'Preference_{pref}'] = 'Important'
-            else:
-                student_data[f'Preference_{pref}'] = random.choice(['Not Important', 'Neutral'])
-        
-        data.append(student_data)
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
+    df = pd.concat(_iter_blocks(n_samples, seed), ignore_index=True)
+
     # Save to CSV if path is provided
     if save_path:
         df.to_csv(save_path, index=False)
         print(f"Data saved to {save_path}")
-    
+
     return df
 
 if __name__ == "__main__":
-    # Generate sample data and save to CSV
-    df = generate_sample_data(n_samples=300, save_path='../../data/student_data.csv')
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate a synthetic student roster")
+    parser.add_argument('--n-samples', type=int, default=300)
+    parser.add_argument('--output', default='../../data/student_data.csv',
+                        help="CSV or .parquet output path")
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help="rows written at a time; the data does not depend on it")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    # Generate sample data and save it
+    write_sample_data(args.output, args.n_samples, chunk_size=args.chunk_size, seed=args.seed)
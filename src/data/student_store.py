@@ -0,0 +1,259 @@
+# src/data/student_store.py
+import copy
+import struct
+
+import numpy as np
+import pandas as pd
+from src.utils.growable import GrowableArray
+
+# Display names of the interest columns, in form order
+INTERESTS = [
+    'Science',
+    'Coding/Game Design',
+    'Reading/Writing',
+    'Engineering',
+    'Art',
+    'Music',
+    'Math'
+]
+INTEREST_NAMES = {f"Interest_{interest.replace('/', '_')}": interest for interest in INTERESTS}
+
+AVAILABLE, NOT_AVAILABLE = 'Available', 'Not available'
+SELECTED, NOT_SELECTED = 'Selected', 'Not selected'
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+    """Count set bits of each uint32 mask"""
+    masks = np.ascontiguousarray(masks, dtype=np.uint32)
+    if hasattr(np, 'bitwise_count'):
+        # NumPy 2.0+ has a native (vectorized) popcount
+        return np.bitwise_count(masks).astype(np.int64)
+    as_bytes = masks.view(np.uint8).reshape(masks.shape + (4,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def pack_bits(values, true_value):
+    """Pack an (n_students, n_columns) array of strings into uint32 bitmasks"""
+    masks = np.zeros(len(values), dtype=np.uint32)
+    for bit in range(values.shape[1]):
+        masks |= (values[:, bit] == true_value).astype(np.uint32) << np.uint32(bit)
+    return masks
+
+
+def bit_names(mask, names):
+    """Names of the set bits of a mask, in bit order"""
+    mask = int(mask)
+    return [name for bit, name in enumerate(names) if mask >> bit & 1]
+
+
+class StudentStore:
+    """Compact columnar storage of the student population.
+
+    Categorical columns are kept as uint8 codes into per-column vocabularies,
+    ages as int8, the 21 availability slots as a uint32 bitmask, the
+    interests as a uint8 bitmask and nicknames in an interned string table.
+    Rows are appended in amortized O(1) and read back as plain dicts.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.availability_cols = None
+        self.interest_cols = None
+        self.categorical_cols = None
+        self.vocabularies = None
+        self.nickname_table = None
+        self._nickname_lookup = None
+        self._nicknames = None
+        self._ages = None
+        self._codes = None
+        self._availability = None
+        self._availability_counts = None
+        self._interests = None
+
+    def fit(self, df):
+        """Set the schema from the training data and store its rows"""
+        self.columns = list(df.columns)
+        self.availability_cols = [col for col in df.columns if col.startswith('Available_Time_')]
+        self.interest_cols = [col for col in df.columns if col.startswith('Interest_')]
+        if len(self.availability_cols) > 32 or len(self.interest_cols) > 8:
+            raise ValueError("Too many availability or interest columns for the bitmasks")
+        self.categorical_cols = [
+            col for col in df.columns
+            if col not in ('Child_Nickname', 'Child_Age')
+            and col not in self.availability_cols and col not in self.interest_cols
+        ]
+        self.vocabularies = {col: [] for col in self.categorical_cols}
+        self.nickname_table = []
+        self._nickname_lookup = {}
+
+        self._nicknames = GrowableArray(dtype=np.uint32)
+        self._ages = GrowableArray(dtype=np.int8)
+        self._codes = GrowableArray(dtype=np.uint8, row_shape=(len(self.categorical_cols),))
+        self._availability = GrowableArray(dtype=np.uint32)
+        self._availability_counts = GrowableArray(dtype=np.uint8)
+        self._interests = GrowableArray(dtype=np.uint8)
+        self.append(df)
+        return self
+
+    def __len__(self):
+        return 0 if self._ages is None else len(self._ages)
+
+    @property
+    def ages(self):
+        return self._ages.data
+
+    @property
+    def availability(self):
+        return self._availability.data
+
+    @property
+    def availability_counts(self):
+        return self._availability_counts.data
+
+    @property
+    def interests(self):
+        return self._interests.data
+
+    @property
+    def availability_slots(self):
+        return [col.replace('Available_Time_', '') for col in self.availability_cols]
+
+    @property
+    def interest_names(self):
+        return [INTEREST_NAMES.get(col, col[len('Interest_'):]) for col in self.interest_cols]
+
+    def codes(self, column):
+        """uint8 codes of a categorical column"""
+        return self._codes.data[:, self.categorical_cols.index(column)]
+
+    def vocabulary(self, column):
+        return self.vocabularies[column]
+
+    def _encode(self, vocabulary, values):
+        lookup = {value: code for code, value in enumerate(vocabulary)}
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(vocabulary)
+                vocabulary.append(value)
+            codes[i] = code
+        return codes
+
+    def append(self, students):
+        """Append students from a DataFrame or list of dicts"""
+        if not isinstance(students, pd.DataFrame):
+            students = pd.DataFrame(list(students), columns=self.columns)
+        if not len(students):
+            return
+
+        nickname_codes = self._encode(self.nickname_table, students['Child_Nickname'].astype(str).values)
+        codes = np.stack([
+            self._encode(self.vocabularies[col], students[col].astype(str).values)
+            for col in self.categorical_cols
+        ], axis=1)
+        if codes.max(initial=0) > np.iinfo(np.uint8).max:
+            raise ValueError("Too many distinct categories for uint8 codes")
+        availability = pack_bits(students[self.availability_cols].values, AVAILABLE)
+
+        self._nicknames.append(nickname_codes)
+        self._ages.append(students['Child_Age'].values.astype(np.int8))
+        self._codes.append(codes)
+        self._availability.append(availability)
+        self._availability_counts.append(popcount(availability))
+        self._interests.append(pack_bits(students[self.interest_cols].values, SELECTED))
+
+    def arrays(self):
+        """The per-student GrowableArrays, by name"""
+        return {
+            'nicknames': self._nicknames,
+            'ages': self._ages,
+            'codes': self._codes,
+            'availability': self._availability,
+            'availability_counts': self._availability_counts,
+            'interests': self._interests,
+        }
+
+    def compact(self, keep):
+        """Drop the students where the boolean mask keep is False"""
+        for array in self.arrays().values():
+            array.compact(keep)
+
+    def view(self):
+        """Store over the current rows only, unaffected by later appends and compactions"""
+        view = copy.copy(self)
+        for name, array in self.arrays().items():
+            setattr(view, f'_{name}', GrowableArray(array.data))
+        return view
+
+    def query_masks(self, student_data):
+        """Availability and interest bitmasks of a student dict"""
+        availability = 0
+        for bit, col in enumerate(self.availability_cols):
+            if student_data.get(col) == AVAILABLE:
+                availability |= 1 << bit
+        interests = 0
+        for bit, col in enumerate(self.interest_cols):
+            if student_data.get(col) == SELECTED:
+                interests |= 1 << bit
+        return availability, interests
+
+    def profile_key(self, student_data):
+        """Canonical packed encoding of the fields that affect matching.
+
+        The nickname is left out. Returns None when a categorical value is
+        not in the vocabulary, since it has no compact code.
+        """
+        availability, interests = self.query_masks(student_data)
+        codes = bytearray()
+        for col in self.categorical_cols:
+            try:
+                codes.append(self.vocabularies[col].index(str(student_data.get(col))))
+            except ValueError:
+                return None
+        return struct.pack('<hIB', int(student_data['Child_Age']), availability, interests) + bytes(codes)
+
+    def shared_interests(self, interest_mask, idx):
+        return bit_names(interest_mask & self._interests.data[idx], self.interest_names)
+
+    def overlapping_availability(self, availability_mask, idx):
+        return bit_names(availability_mask & self._availability.data[idx], self.availability_slots)
+
+    def record(self, idx):
+        """Rebuild the student at a position as a dict in the original column layout"""
+        values = {
+            'Child_Nickname': self.nickname_table[self._nicknames.data[idx]],
+            'Child_Age': int(self._ages.data[idx]),
+        }
+        codes = self._codes.data[idx]
+        for col, code in zip(self.categorical_cols, codes):
+            values[col] = self.vocabularies[col][code]
+        availability = int(self._availability.data[idx])
+        for bit, col in enumerate(self.availability_cols):
+            values[col] = AVAILABLE if availability >> bit & 1 else NOT_AVAILABLE
+        interests = int(self._interests.data[idx])
+        for bit, col in enumerate(self.interest_cols):
+            values[col] = SELECTED if interests >> bit & 1 else NOT_SELECTED
+        return {col: values[col] for col in self.columns}
+
+    def to_frame(self):
+        """Rebuild the whole population as a DataFrame in the original layout"""
+        data = {
+            'Child_Nickname': np.array(self.nickname_table, dtype=object)[self._nicknames.data],
+            'Child_Age': self._ages.data.astype(np.int64),
+        }
+        for i, col in enumerate(self.categorical_cols):
+            data[col] = np.array(self.vocabularies[col], dtype=object)[self._codes.data[:, i]]
+        for bit, col in enumerate(self.availability_cols):
+            data[col] = np.where(self._availability.data >> np.uint32(bit) & 1, AVAILABLE, NOT_AVAILABLE)
+        for bit, col in enumerate(self.interest_cols):
+            data[col] = np.where(self._interests.data >> np.uint8(bit) & 1, SELECTED, NOT_SELECTED)
+        return pd.DataFrame({col: data[col] for col in self.columns})
+
+    def nbytes(self):
+        """Approximate memory used by the store"""
+        total = sum(array.data.nbytes for array in self.arrays().values())
+        total += sum(len(name) + 49 for name in self.nickname_table)
+        return total
@@ -0,0 +1,56 @@
+# src/jobs/match_all.py
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.matching_system import StudentMatchingSystem
+from src.utils.artifacts import file_sha256
+
+
+def run_all_pairs(system, df, output, top_n=5, query_block=256, population_block=16384):
+    """Write the top matches of every student against every other as JSON lines"""
+    df = df.reset_index(drop=True)
+    results = system.iter_matches_batch(
+        df, top_n=top_n, query_block=query_block,
+        population_block=population_block, query_ids=np.arange(len(df))
+    )
+    for idx, matches in enumerate(results):
+        output.write(json.dumps({
+            'student_index': idx,
+            'nickname': df.at[idx, 'Child_Nickname'],
+            'matches': matches,
+        }) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute top-k matches for every student")
+    parser.add_argument('--data', default=os.path.join(project_root, 'data', 'student_data.csv'))
+    parser.add_argument('--artifacts', default=os.path.join(project_root, 'artifacts'))
+    parser.add_argument('--output', default='matches.jsonl', help="JSON lines output file")
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--query-block', type=int, default=256)
+    parser.add_argument('--population-block', type=int, default=16384)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    system = StudentMatchingSystem.load_or_fit(args.artifacts, df, file_sha256(args.data))
+
+    start = time.perf_counter()
+    with open(args.output, 'w') as output:
+        run_all_pairs(system, df, output, top_n=args.top_n,
+                      query_block=args.query_block, population_block=args.population_block)
+    print(f"Matched {len(df)} students in {time.perf_counter() - start:.1f}s, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
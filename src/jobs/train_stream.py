@@ -0,0 +1,52 @@
+# src/jobs/train_stream.py
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.matching_system import StudentMatchingSystem
+from src.utils.artifacts import file_sha256
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the matching model on a roster too large for memory")
+    parser.add_argument('--data', default=os.path.join(project_root, 'data', 'student_data.csv'),
+                        help="roster CSV or Parquet file")
+    parser.add_argument('--artifacts', default=os.path.join(project_root, 'artifacts'))
+    parser.add_argument('--work-dir', help="where the feature memmaps are written (default: a temp dir)")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch-size', type=lambda value: value if value == 'auto' else int(value),
+                        default=32, help="an int, or 'auto' to size batches from the roster")
+    parser.add_argument('--patience', type=int, default=5, help="early stopping patience (0 disables it)")
+    parser.add_argument('--intra-op-threads', type=int, default=0, help="TensorFlow threads per op (0: default)")
+    parser.add_argument('--inter-op-threads', type=int, default=0, help="TensorFlow concurrent ops (0: default)")
+    args = parser.parse_args()
+
+    from src.models.autoencoder import configure_threads
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        system = StudentMatchingSystem()
+        system.fit_stream(args.data, args.work_dir or temp_dir, chunk_size=args.chunk_size,
+                          epochs=args.epochs, batch_size=args.batch_size, patience=args.patience)
+        system.save(args.artifacts, data_hash=file_sha256(args.data))
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report = system.autoencoder.training_report
+    print(f"Trained on {len(system.students)} students in {time.perf_counter() - start:.1f}s "
+          f"({report['epochs']} epochs of batch size {report['batch_size']}, "
+          f"{report['total_seconds'] / report['epochs']:.2f}s per epoch, peak RSS {peak_mb:.0f} MB), "
+          f"saved to {args.artifacts}")
+
+
+if __name__ == "__main__":
+    main()
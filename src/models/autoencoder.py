@@ -1,6 +1,85 @@
 # src/models/autoencoder.py
+import itertools
+import logging
+import os
+import time
+
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, Model
+from src.models.numpy_encoder import NumpyEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEARNING_RATE = 1e-3
+
+
+def configure_threads(intra_op_threads=None, inter_op_threads=None):
+    """Set TensorFlow's CPU thread pools (0 or None keeps TensorFlow's default).
+
+    Only takes effect before TensorFlow runs its first operation.
+    """
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError:
+        logger.warning("TensorFlow is already initialized; thread settings ignored")
+
+
+# e.g. MATCHING_TF_INTRA_OP_THREADS=8 MATCHING_TF_INTER_OP_THREADS=2
+configure_threads(int(os.environ.get('MATCHING_TF_INTRA_OP_THREADS', 0)),
+                  int(os.environ.get('MATCHING_TF_INTER_OP_THREADS', 0)))
+
+
+def auto_batch_size(n_samples, steps_per_epoch=100, min_size=32, max_size=1024):
+    """Power of two batch size giving about steps_per_epoch steps per epoch"""
+    size = 2 ** int(np.log2(max(n_samples // steps_per_epoch, 1)))
+    return int(min(max(size, min_size), max_size))
+
+
+class TrainingTimer(tf.keras.callbacks.Callback):
+    """Records wall time per epoch and when the loss first reaches target_loss"""
+
+    def __init__(self, target_loss=None, monitor='val_loss'):
+        super().__init__()
+        self.target_loss = target_loss
+        self.monitor = monitor
+        self.epoch_seconds = []
+        self.losses = []
+        self.time_to_target = None
+        self.epochs_to_target = None
+
+    def on_train_begin(self, logs=None):
+        self._train_start = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_seconds.append(time.perf_counter() - self._epoch_start)
+        loss = (logs or {}).get(self.monitor)
+        self.losses.append(loss)
+        if (self.target_loss is not None and self.time_to_target is None
+                and loss is not None and loss <= self.target_loss):
+            self.time_to_target = time.perf_counter() - self._train_start
+            self.epochs_to_target = epoch + 1
+        logger.info("Epoch %d: %s=%.5f in %.2fs", epoch + 1, self.monitor,
+                    float('nan') if loss is None else loss, self.epoch_seconds[-1])
+
+    def report(self):
+        return {
+            'epochs': len(self.epoch_seconds),
+            'epoch_seconds': self.epoch_seconds,
+            'losses': self.losses,
+            'total_seconds': float(sum(self.epoch_seconds)),
+            'final_loss': self.losses[-1] if self.losses else None,
+            'best_loss': min((loss for loss in self.losses if loss is not None), default=None),
+            'target_loss': self.target_loss,
+            'time_to_target': self.time_to_target,
+            'epochs_to_target': self.epochs_to_target,
+        }
 
 class StudentAutoencoder:
     def __init__(self, input_dim, encoding_dim=32):
@@ -8,6 +87,7 @@ class StudentAutoencoder:
         self.encoding_dim = encoding_dim
         self.autoencoder = self._build_autoencoder()
         self.encoder = self._build_encoder()
+        self.training_report = None
         
     def _build_autoencoder(self):
         # Encoder
@@ -33,17 +113,132 @@ class StudentAutoencoder:
         
         return encoder
     
-    def train(self, X, epochs=50, batch_size=32, validation_split=0.2):
-        """Train the autoencoder"""
+    def _prepare(self, n_samples, batch_size, learning_rate, jit_compile):
+        """Resolve the batch size and recompile with a fresh optimizer"""
+        if batch_size == 'auto':
+            batch_size = auto_batch_size(n_samples)
+            # Larger batches take proportionally larger steps
+            learning_rate = learning_rate or DEFAULT_LEARNING_RATE * np.sqrt(batch_size / 32)
+        self.autoencoder.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate or DEFAULT_LEARNING_RATE),
+            loss='mse',
+            jit_compile=jit_compile
+        )
+        return batch_size
+
+    def _callbacks(self, monitor, patience, lr_patience, min_delta, target_loss):
+        timer = TrainingTimer(target_loss=target_loss, monitor=monitor)
+        callbacks = [timer]
+        if lr_patience:
+            callbacks.append(tf.keras.callbacks.ReduceLROnPlateau(
+                monitor=monitor, factor=0.5, patience=lr_patience, min_delta=min_delta, min_lr=1e-5
+            ))
+        if patience:
+            callbacks.append(tf.keras.callbacks.EarlyStopping(
+                monitor=monitor, patience=patience, min_delta=min_delta, restore_best_weights=True
+            ))
+        return timer, callbacks
+
+    def train(self, X, epochs=50, batch_size=32, validation_split=0.2, patience=None,
+              lr_patience=None, min_delta=1e-4, learning_rate=None, target_loss=None,
+              jit_compile=False, verbose=0):
+        """Train the autoencoder.
+
+        epochs is an upper bound when patience is set: training stops once
+        the validation loss has not improved by min_delta for patience
+        epochs, and the best weights are restored. lr_patience halves the
+        learning rate on plateaus. batch_size='auto' picks a power of two for
+        about 100 steps per epoch and scales the learning rate with it.
+        jit_compile compiles the float32 training step with XLA. Wall time
+        per epoch and the time to reach target_loss end up in
+        self.training_report.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        batch_size = self._prepare(int(len(X) * (1 - validation_split)), batch_size,
+                                   learning_rate, jit_compile)
+        monitor = 'val_loss' if validation_split else 'loss'
+        timer, callbacks = self._callbacks(monitor, patience, lr_patience, min_delta, target_loss)
         history = self.autoencoder.fit(
             X, X,
             epochs=epochs,
             batch_size=batch_size,
             validation_split=validation_split,
-            verbose=1
+            callbacks=callbacks,
+            verbose=verbose
         )
+        self.training_report = dict(timer.report(), batch_size=batch_size)
         return history
     
+    def train_stream(self, X, epochs=50, batch_size=32, validation_split=0.2,
+                     chunk_size=65536, seed=0, patience=None, lr_patience=None,
+                     min_delta=1e-4, learning_rate=None, target_loss=None,
+                     jit_compile=False, verbose=0):
+        """Train from a feature matrix too large to copy, e.g. a memmap.
+
+        A tf.data pipeline reads chunk_size rows at a time, in a shuffled
+        chunk order with rows shuffled within each chunk, and prefetches
+        batches while the previous step runs. The last validation_split of
+        the rows is held out, as with train(), which documents the other
+        options.
+        """
+        n_validation = int(len(X) * validation_split)
+        n_train = len(X) - n_validation
+        batch_size = self._prepare(n_train, batch_size, learning_rate, jit_compile)
+        epoch_seeds = itertools.count(seed)
+
+        def dataset(start, stop, shuffle):
+            def batches():
+                rng = np.random.default_rng(next(epoch_seeds))
+                chunk_starts = np.arange(start, stop, chunk_size)
+                if shuffle:
+                    rng.shuffle(chunk_starts)
+                for chunk_start in chunk_starts:
+                    chunk = np.asarray(X[chunk_start:min(chunk_start + chunk_size, stop)], dtype=np.float32)
+                    if shuffle:
+                        chunk = chunk[rng.permutation(len(chunk))]
+                    for batch_start in range(0, len(chunk), batch_size):
+                        yield chunk[batch_start:batch_start + batch_size]
+
+            chunk_sizes = np.minimum(chunk_size, stop - np.arange(start, stop, chunk_size))
+            n_batches = int(np.sum(-(-chunk_sizes // batch_size)))
+            return tf.data.Dataset.from_generator(
+                batches, output_signature=tf.TensorSpec((None, self.input_dim), tf.float32)
+            ).apply(tf.data.experimental.assert_cardinality(n_batches)).map(
+                lambda batch: (batch, batch)
+            ).prefetch(tf.data.AUTOTUNE)
+
+        timer, callbacks = self._callbacks('val_loss' if n_validation else 'loss',
+                                           patience, lr_patience, min_delta, target_loss)
+        history = self.autoencoder.fit(
+            dataset(0, n_train, shuffle=True),
+            validation_data=dataset(n_train, len(X), shuffle=False) if n_validation else None,
+            epochs=epochs,
+            shuffle=False,  # the pipeline shuffles
+            callbacks=callbacks,
+            verbose=verbose
+        )
+        self.training_report = dict(timer.report(), batch_size=batch_size)
+        return history
+
     def encode(self, X):
         """Encode the input data to the latent space"""
-        return self.encoder.predict(X)
\ No newline at end of file
+        return self.encoder.predict(X, verbose=0)
+    
+    def export_numpy_encoder(self, precision='float32'):
+        """Export the encoder layers for TensorFlow-free inference"""
+        return NumpyEncoder.from_keras(self.encoder, precision=precision)
+    
+    def export_numpy_autoencoder(self):
+        """Export the full autoencoder, used to measure reconstruction error"""
+        return NumpyEncoder.from_keras(self.autoencoder)
+    
+    def save_weights(self, path):
+        """Save the trained autoencoder weights"""
+        self.autoencoder.save_weights(path)
+    
+    @classmethod
+    def load(cls, path, input_dim, encoding_dim=32):
+        """Rebuild the autoencoder and restore saved weights"""
+        model = cls(input_dim, encoding_dim=encoding_dim)
+        model.autoencoder.load_weights(path)
+        return model
@@ -0,0 +1,67 @@
+# src/models/drift.py
+import numpy as np
+
+
+def reconstruction_errors(autoencoder, X):
+    """Per-row mean squared reconstruction error"""
+    X = np.asarray(X, dtype=np.float32)
+    return np.mean((autoencoder.encode(X) - X) ** 2, axis=1)
+
+
+class DriftMonitor:
+    """Tracks how well the trained autoencoder reconstructs newly added students.
+
+    The baseline is the reconstruction error on the training data. Once
+    enough students have been added, a retrain is recommended if their mean
+    error exceeds the baseline by error_ratio_threshold.
+    """
+
+    def __init__(self, error_ratio_threshold=1.5, min_samples=50):
+        self.error_ratio_threshold = error_ratio_threshold
+        self.min_samples = min_samples
+        self.baseline_error = None
+        self.baseline_p95 = None
+        self.reset()
+
+    def fit(self, errors):
+        """Set the baseline from the training reconstruction errors"""
+        self.baseline_error = float(np.mean(errors))
+        self.baseline_p95 = float(np.percentile(errors, 95))
+        self.reset()
+        return self
+
+    def reset(self):
+        self.n_samples = 0
+        self.error_sum = 0.0
+        self.n_outliers = 0
+
+    def update(self, errors):
+        """Record the reconstruction errors of newly added students"""
+        self.n_samples += len(errors)
+        self.error_sum += float(np.sum(errors))
+        self.n_outliers += int(np.sum(errors > self.baseline_p95))
+
+    def report(self):
+        recent_error = self.error_sum / self.n_samples if self.n_samples else None
+        error_ratio = (recent_error / self.baseline_error
+                       if recent_error is not None and self.baseline_error else None)
+        return {
+            'baseline_error': self.baseline_error,
+            'recent_error': recent_error,
+            'error_ratio': error_ratio,
+            'outlier_fraction': self.n_outliers / self.n_samples if self.n_samples else None,
+            'n_samples': self.n_samples,
+            'retrain_recommended': bool(
+                self.n_samples >= self.min_samples
+                and error_ratio is not None
+                and error_ratio > self.error_ratio_threshold
+            ),
+        }
+
+    def state(self):
+        return {'baseline_error': self.baseline_error, 'baseline_p95': self.baseline_p95}
+
+    def load_state(self, state):
+        self.baseline_error = state['baseline_error']
+        self.baseline_p95 = state['baseline_p95']
+        self.reset()
@@ -0,0 +1,79 @@
+# src/models/filtering.py
+import numpy as np
+
+from src.data.student_store import popcount
+
+# Keyword arguments accepted by CandidateFilter.candidates()
+CONSTRAINTS = ('max_age_gap', 'min_overlap_slots', 'same_region', 'same_gender')
+
+
+def _bitset(mask):
+    return np.packbits(mask, bitorder='little')
+
+
+class CandidateFilter:
+    """Inverted indexes over the student population for hard constraints.
+
+    Every region, gender and age maps to a bitset of the population
+    positions holding it, and every availability slot to a bitset of the
+    students available then. Constraints are answered with bitwise AND/OR
+    over n/8 bytes, so only the surviving candidates need to be scored.
+    """
+
+    def __init__(self, store, alive=None):
+        self.store = store
+        self.n_students = len(store)
+        n_bytes = (self.n_students + 7) // 8
+        self.empty = np.zeros(n_bytes, dtype=np.uint8)
+        self.alive = _bitset(np.ones(self.n_students, dtype=bool) if alive is None else alive)
+
+        region_codes = store.codes('Child_Region')
+        self.region_bitsets = {
+            region: _bitset(region_codes == code)
+            for code, region in enumerate(store.vocabulary('Child_Region'))
+        }
+        gender_codes = store.codes('Child_Gender')
+        self.gender_bitsets = {
+            gender: _bitset(gender_codes == code)
+            for code, gender in enumerate(store.vocabulary('Child_Gender'))
+        }
+        self.age_bitsets = {int(age): _bitset(store.ages == age) for age in np.unique(store.ages)}
+        self.slot_bitsets = np.stack([
+            _bitset(store.availability >> np.uint32(bit) & 1)
+            for bit in range(len(store.availability_cols))
+        ]) if self.n_students else np.zeros((len(store.availability_cols), 0), dtype=np.uint8)
+
+    def ids(self, bitset):
+        """Positions of the set bits of a bitset"""
+        bits = np.unpackbits(bitset, count=self.n_students, bitorder='little')
+        return np.flatnonzero(bits.view(bool))
+
+    def candidates(self, student_data, max_age_gap=None, min_overlap_slots=None,
+                   same_region=False, same_gender=False):
+        """Positions of the live students satisfying every given constraint"""
+        selected = self.alive.copy()
+        if same_region:
+            selected &= self.region_bitsets.get(student_data.get('Child_Region'), self.empty)
+        if same_gender:
+            selected &= self.gender_bitsets.get(student_data.get('Child_Gender'), self.empty)
+
+        if max_age_gap is not None:
+            age = int(student_data['Child_Age'])
+            within_gap = self.empty.copy()
+            for other_age, bitset in self.age_bitsets.items():
+                if abs(other_age - age) <= max_age_gap:
+                    within_gap |= bitset
+            selected &= within_gap
+
+        if min_overlap_slots:
+            availability, _ = self.store.query_masks(student_data)
+            slots = [bit for bit in range(len(self.slot_bitsets)) if availability >> bit & 1]
+            if len(slots) < min_overlap_slots:
+                return np.empty(0, dtype=np.int64)
+            if min_overlap_slots == 1:
+                selected &= np.bitwise_or.reduce(self.slot_bitsets[slots], axis=0)
+            else:
+                overlap = popcount(self.store.availability & np.uint32(availability))
+                selected &= _bitset(overlap >= min_overlap_slots)
+
+        return self.ids(selected)
@@ -1,18 +1,68 @@
 # src/models/matching_system.py
+import logging
+import os
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+from src.data.student_store import StudentStore
 from src.utils.preprocessing import DataPreprocessor
-from src.models.autoencoder import StudentAutoencoder
+from src.models.drift import DriftMonitor, reconstruction_errors
+from src.models.numpy_encoder import NumpyEncoder
+from src.models.penalties import PenaltyEngine
+from src.models.population import Population
+from src.models.ranking import MatchRanking
+from src.models.retrieval import build_index, normalize_rows, recall_at_k, top_k_indices
+from src.utils.artifacts import load_pickle, read_metadata, save_pickle, write_metadata
+from src.utils.growable import GrowableArray
+from src.utils.instrumentation import instrumentation as default_instrumentation
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 5
+
+# Keys of each match returned by find_matches; the explanation fields are
+# the ones that cost more than reading the scores
+MATCH_FIELDS = ('student_id', 'student', 'similarity_score', 'base_similarity', 'penalty',
+                'age_difference', 'shared_interests', 'overlapping_availability')
+EXPLANATION_FIELDS = ('student', 'age_difference', 'shared_interests', 'overlapping_availability')
 
 class StudentMatchingSystem:
-    def __init__(self, encoding_dim=32):
+    def __init__(self, encoding_dim=32, index_backend='exact', index_params=None,
+                 candidate_pool=None, encoder_precision='float32', compaction_threshold=0.2,
+                 instrumentation=None):
         self.preprocessor = DataPreprocessor()
         self.encoding_dim = encoding_dim
         self.autoencoder = None
+        
+        # TensorFlow is only needed for training; inference runs on the
+        # exported NumPy encoder
+        self.encoder = None
+        self.encoder_precision = encoder_precision
         self.processed_data = None
-        self.original_data = None
-        self.encoded_features = None
+        self.feature_columns = None
+        
+        # Population arrays, indexed by position. Students keep a stable id;
+        # removed students are tombstoned until the next compaction. Readers
+        # only use the Population published after each change, never these.
+        self.students = StudentStore()
+        self._features = None
+        self._student_ids = None
+        self._alive = None
+        self._n_removed = 0
+        self._next_id = 0
+        self.compaction_threshold = compaction_threshold
+        self._population = None
+        
+        # Reconstruction error of added students, to tell when to retrain
+        self.reconstructor = None
+        self.drift_monitor = DriftMonitor()
+        
+        # Retrieval index over the encoded features. With a candidate_pool,
+        # only that many nearest neighbours are re-ranked with penalties;
+        # None scores the whole population.
+        self.index_backend = index_backend
+        self.index_params = index_params or {}
+        self.candidate_pool = candidate_pool
+        self.index = None
         
         # Define importance weights
         self.weights = {
@@ -20,18 +70,69 @@ class StudentMatchingSystem:
             'Neutral': 0.5,
             'Not Important': 0.1
         }
+        self.penalty_engine = PenaltyEngine(self.weights)
+        self.instrumentation = instrumentation or default_instrumentation
 
-    def fit(self, df, epochs=50, batch_size=32):
-        """Fit the matching system to the student data"""
-        self.original_data = df.copy()
+    @property
+    def encoded_features(self):
+        return None if self._features is None else self._features.data
+
+    @property
+    def original_data(self):
+        """The student population as a DataFrame (rebuilt from the store)"""
+        return self.students.to_frame()
+
+    @encoded_features.setter
+    def encoded_features(self, features):
+        self._features = GrowableArray(features)
+
+    @property
+    def population(self):
+        """The current Population; take it once and use it throughout a request"""
+        return self._population
+
+    @property
+    def population_version(self):
+        return 0 if self._population is None else self._population.version
+
+    def _publish(self):
+        """Publish a view of the population arrays as the new Population.
+
+        Writers call this once their changes are complete; a single
+        assignment swaps it in, so readers see all of a change or none of it.
+        """
+        self._population = Population(
+            self.population_version + 1, self.students.view(), self.index.view(),
+            self._student_ids.data, self._alive.data, self._n_removed, self.weights
+        )
+
+    def _reset_population(self, n_students):
+        self._student_ids = GrowableArray(np.arange(n_students, dtype=np.int64))
+        self._alive = GrowableArray(np.ones(n_students, dtype=bool))
+        self._n_removed = 0
+        self._next_id = n_students
+
+    def fit(self, df, epochs=50, batch_size=32, patience=5, lr_patience=2, **train_options):
+        """Fit the matching system to the student data.
+
+        Training stops early once the validation loss stalls for patience
+        epochs (epochs is the upper bound). batch_size, lr_patience and any
+        other train_options are passed on to StudentAutoencoder.train();
+        batch_size='auto' trains faster but fails the match quality gate of
+        benchmarks/bench_training.py, so it is not the default.
+        """
+        self.students.fit(df)
+        self.penalty_engine.fit(self.students)
         
         # First fit the preprocessor
         self.preprocessor.fit(df)
         
         # Then preprocess the data
         self.processed_data = self.preprocessor.preprocess_data(df)
+        self.feature_columns = list(self.processed_data.columns)
         
         # Initialize and train autoencoder
+        from src.models.autoencoder import StudentAutoencoder
         self.autoencoder = StudentAutoencoder(
             input_dim=self.processed_data.shape[1],
             encoding_dim=self.encoding_dim
@@ -40,181 +141,617 @@ class StudentMatchingSystem:
         history = self.autoencoder.train(
             self.processed_data.values,
             epochs=epochs,
-            batch_size=batch_size
+            batch_size=batch_size,
+            patience=patience,
+            lr_patience=lr_patience,
+            **train_options
         )
         
-        # Generate encoded features
-        self.encoded_features = self.autoencoder.encode(self.processed_data.values)
+        # Export the encoder and generate encoded features
+        self.encoder = self.autoencoder.export_numpy_encoder(self.encoder_precision)
+        self.encoded_features = self.encoder.encode(self.processed_data.values)
+        self._reset_population(len(self.students))
+        
+        # Baseline reconstruction error for drift monitoring
+        self.reconstructor = self.autoencoder.export_numpy_autoencoder()
+        self.drift_monitor.fit(reconstruction_errors(self.reconstructor, self.processed_data.values))
+        
+        # Build the retrieval index over the latent vectors
+        self.index = build_index(self.encoded_features, self.index_backend, **self.index_params)
+        if self.index_backend != 'exact':
+            logger.info("Index recall@10 vs exact search: %.3f", self.index_recall(k=10))
+        self._publish()
         
         return history
 
-    def _calculate_penalties(self, student_data):
-        """Calculate penalties based on preferences with weighted importance"""
-        penalties = np.zeros(len(self.original_data))
-        
-        for idx, row in self.original_data.iterrows():
-            # Age difference penalty - improved version
-            age_importance = self.weights.get(student_data['Preference_Similar_Age'], 0.5)
-            if age_importance > 0:
-                age_diff = abs(student_data['Child_Age'] - row['Child_Age'])
-                # Normalize age difference penalty
-                # For ages 3-13, max difference is 10 years
-                normalized_age_diff = age_diff / 10.0
-                # Apply weighted penalty based on importance
-                penalties[idx] += normalized_age_diff * age_importance * 0.5
-            
-            # Gender matching penalty - improved version
-            gender_importance = self.weights.get(student_data['Preference_Same_Gender'], 0.5)
-            if gender_importance > 0:
-                if student_data['Child_Gender'] != row['Child_Gender']:
-                    # Apply different penalties based on gender combinations
-                    if student_data['Child_Gender'] in ['Male', 'Female'] and row['Child_Gender'] in ['Male', 'Female']:
-                        # Binary gender mismatch
-                        penalties[idx] += 0.3 * gender_importance
-                    elif 'Prefer not to say' in [student_data['Child_Gender'], row['Child_Gender']]:
-                        # One student prefers not to say
-                        penalties[idx] += 0.1 * gender_importance
-                    else:
-                        # Other gender combinations
-                        penalties[idx] += 0.2 * gender_importance
-            
-            # Time overlap penalty - improved version
-            time_importance = self.weights.get(student_data['Preference_Overlapping_Time'], 0.5)
-            if time_importance > 0:
-                availability_cols = [col for col in self.original_data.columns 
-                                   if col.startswith('Available_Time_')]
-                
-                # Count total available slots for each student
-                student1_available = sum(1 for col in availability_cols 
-                                     if student_data[col] == 'Available')
-                student2_available = sum(1 for col in availability_cols 
-                                     if row[col] == 'Available')
-                
-                # Count overlapping slots
-                overlapping_slots = sum(1 for col in availability_cols 
-                                    if student_data[col] == 'Available' 
-                                    and row[col] == 'Available')
-                
-                if student1_available == 0 or student2_available == 0:
-                    penalties[idx] += 0.5 * time_importance
-                else:
-                    # Calculate overlap ratio
-                    overlap_ratio = overlapping_slots / min(student1_available, student2_available)
-                    # Add penalty based on lack of overlap
-                    penalties[idx] += (1 - overlap_ratio) * time_importance * 0.3
-                
-                # Additional penalty for different regions (time zone consideration)
-                if student_data['Child_Region'] != row['Child_Region']:
-                    penalties[idx] += 0.15 * time_importance
+    def fit_stream(self, path, work_dir, chunk_size=100000, epochs=50, batch_size=32,
+                   patience=5, lr_patience=2, **train_options):
+        """Fit the matching system on a roster file without loading it whole.
+
+        The CSV or Parquet roster is read chunk_size rows at a time: a first
+        pass fills the student store and fits the preprocessor incrementally,
+        a second writes the preprocessed features to work_dir/features.npy.
+        The autoencoder trains from that memmap through a tf.data pipeline,
+        and the codes go to work_dir/encoded_features.npy, which stays
+        memory-mapped as the system's features. Peak memory is bounded by
+        the chunk size plus the compact student store and the index.
+        """
+        from src.data.chunks import iter_roster_chunks
+        from src.models.autoencoder import StudentAutoencoder
+
+        self.students = StudentStore()
+        self.preprocessor = DataPreprocessor()
+        n_students = 0
+        for chunk in iter_roster_chunks(path, chunk_size):
+            if n_students:
+                self.students.append(chunk)
+            else:
+                self.students.fit(chunk)
+            self.preprocessor.partial_fit(chunk)
+            n_students += len(chunk)
+        if not n_students:
+            raise ValueError(f"{path} has no students")
+        self.penalty_engine.fit(self.students)
+        self.processed_data = None
+        self.feature_columns = list(self.preprocessor.feature_plan.columns)
+
+        os.makedirs(work_dir, exist_ok=True)
+        features_path = os.path.join(work_dir, 'features.npy')
+        features = np.lib.format.open_memmap(
+            features_path, mode='w+', dtype=np.float32,
+            shape=(n_students, len(self.feature_columns))
+        )
+        start = 0
+        for chunk in iter_roster_chunks(path, chunk_size):
+            processed = self.preprocessor.preprocess_data(chunk)
+            features[start:start + len(chunk)] = processed[self.feature_columns].values
+            start += len(chunk)
+        features.flush()
+
+        self.autoencoder = StudentAutoencoder(
+            input_dim=len(self.feature_columns),
+            encoding_dim=self.encoding_dim
+        )
+        history = self.autoencoder.train_stream(
+            features, epochs=epochs, batch_size=batch_size, chunk_size=chunk_size,
+            patience=patience, lr_patience=lr_patience, **train_options
+        )
+
+        # Encode chunk by chunk into a memmap, with the drift baseline errors
+        self.encoder = self.autoencoder.export_numpy_encoder(self.encoder_precision)
+        self.reconstructor = self.autoencoder.export_numpy_autoencoder()
+        encoded_path = os.path.join(work_dir, 'encoded_features.npy')
+        encoded = np.lib.format.open_memmap(
+            encoded_path, mode='w+', dtype=np.float32, shape=(n_students, self.encoding_dim)
+        )
+        errors = np.empty(n_students, dtype=np.float32)
+        for start in range(0, n_students, chunk_size):
+            X = np.asarray(features[start:start + chunk_size])
+            encoded[start:start + len(X)] = self.encoder.encode(X)
+            errors[start:start + len(X)] = reconstruction_errors(self.reconstructor, X)
+        encoded.flush()
+        del features, encoded
+        os.remove(features_path)
+
+        self.encoded_features = np.load(encoded_path, mmap_mode='r')
+        self._reset_population(n_students)
+        self.drift_monitor.fit(errors)
+        self.index = build_index(self.encoded_features, self.index_backend, **self.index_params)
+        if self.index_backend != 'exact':
+            logger.info("Index recall@10 vs exact search: %.3f", self.index_recall(k=10))
+        self._publish()
+
+        return history
+
+    def index_recall(self, k=10, n_queries=200, seed=0):
+        """Recall@k of the retrieval index against exact search"""
+        rng = np.random.default_rng(seed)
+        n_queries = min(n_queries, len(self.encoded_features))
+        query_ids = rng.choice(len(self.encoded_features), n_queries, replace=False)
+        exact = build_index(self.encoded_features, 'exact')
+        return recall_at_k(self.index, exact, self.encoded_features[query_ids], k=k)
+
+    def save(self, directory, data_hash=None):
+        """Save the trained model so it can be loaded without retraining.
+
+        data_hash identifies the training data (e.g. the CSV content hash)
+        and is checked by artifacts_match() before loading.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.compact()
+        save_pickle(self.students, os.path.join(directory, 'students.pkl'))
+        np.save(os.path.join(directory, 'student_ids.npy'), self._student_ids.data)
+        self.reconstructor.save(os.path.join(directory, 'autoencoder.npz'))
+        self.preprocessor.save(os.path.join(directory, 'preprocessor.pkl'))
+        self.encoder.save(os.path.join(directory, 'encoder.npz'))
+        if self.autoencoder is not None:
+            self.autoencoder.save_weights(os.path.join(directory, 'autoencoder.weights.h5'))
+        np.save(os.path.join(directory, 'encoded_features.npy'),
+                np.ascontiguousarray(self.encoded_features, dtype=np.float32))
+        write_metadata(directory, {
+            'artifact_version': ARTIFACT_VERSION,
+            'data_hash': data_hash,
+            'n_students': len(self.encoded_features),
+            'input_dim': len(self.feature_columns),
+            'encoding_dim': self.encoding_dim,
+            'feature_columns': self.feature_columns,
+            'index_backend': self.index_backend,
+            'index_params': self.index_params,
+            'candidate_pool': self.candidate_pool,
+            'encoder_precision': self.encoder_precision,
+            'drift_baseline': self.drift_monitor.state(),
+            'next_student_id': self._next_id,
+        })
+
+    @staticmethod
+    def artifacts_match(directory, data_hash):
+        """Check whether saved artifacts exist and were trained on data_hash"""
+        metadata = read_metadata(directory)
+        return (metadata is not None
+                and metadata.get('artifact_version') == ARTIFACT_VERSION
+                and metadata.get('data_hash') == data_hash)
+
+    @classmethod
+    def load(cls, directory, mmap=True, encoder_precision=None, load_autoencoder=False):
+        """Load a system saved with save(), including its student population.
+
+        Only the NumPy encoders are loaded unless load_autoencoder is set, so
+        serving does not import TensorFlow.
+        """
+        metadata = read_metadata(directory)
+        if metadata is None:
+            raise FileNotFoundError(f"No saved matching system in {directory}")
         
-        return penalties
+        system = cls(
+            encoding_dim=metadata['encoding_dim'],
+            index_backend=metadata['index_backend'],
+            index_params=metadata['index_params'],
+            candidate_pool=metadata['candidate_pool'],
+            encoder_precision=encoder_precision or metadata['encoder_precision'],
+        )
+        system.students = load_pickle(os.path.join(directory, 'students.pkl'))
+        system.penalty_engine.fit(system.students)
+        system.preprocessor = DataPreprocessor.load(os.path.join(directory, 'preprocessor.pkl'))
+        system.feature_columns = metadata['feature_columns']
+        system.encoder = NumpyEncoder.load(
+            os.path.join(directory, 'encoder.npz'),
+            precision=system.encoder_precision
+        )
+        system.reconstructor = NumpyEncoder.load(os.path.join(directory, 'autoencoder.npz'))
+        system.drift_monitor.load_state(metadata['drift_baseline'])
+        if load_autoencoder:
+            from src.models.autoencoder import StudentAutoencoder
+            system.autoencoder = StudentAutoencoder.load(
+                os.path.join(directory, 'autoencoder.weights.h5'),
+                input_dim=metadata['input_dim'],
+                encoding_dim=metadata['encoding_dim']
+            )
+        system.encoded_features = np.load(
+            os.path.join(directory, 'encoded_features.npy'),
+            mmap_mode='r' if mmap else None
+        )
+        system._reset_population(metadata['n_students'])
+        system.index = build_index(system.encoded_features, system.index_backend,
+                                   **system.index_params)
+        system.assign_student_ids(np.load(os.path.join(directory, 'student_ids.npy')))
+        system._next_id = metadata['next_student_id']
+        return system
 
-    def find_matches(self, student_data, top_n=5):
-        """Find top matches for a given student with improved matching logic"""
-        print("\nStarting matching process...")
-        print(f"Input student data: {student_data}")
+    @classmethod
+    def load_or_fit(cls, directory, df, data_hash, **fit_kwargs):
+        """Load saved artifacts trained on data_hash, otherwise fit and save"""
+        if cls.artifacts_match(directory, data_hash):
+            logger.info("Loading saved matching model from %s", directory)
+            return cls.load(directory)
         
-        # Convert single student data to DataFrame
-        student_df = pd.DataFrame([student_data])
+        logger.info("Training matching model...")
+        system = cls()
+        system.fit(df, **fit_kwargs)
+        system.save(directory, data_hash=data_hash)
+        logger.info("Matching model saved to %s", directory)
+        return system
+
+    def add_students(self, students, student_ids=None):
+        """Add students (a DataFrame or list of dicts) without retraining.
+
+        New students are encoded with the existing encoder and appended to the
+        feature, penalty and index arrays. Returns their student ids, which
+        are newly assigned unless given (in increasing order) as student_ids.
+        Population changes must not run concurrently with each other (callers
+        serialize them, e.g. with ModelHandle.lock); matching may.
+        """
+        records = students.to_dict('records') if isinstance(students, pd.DataFrame) else list(students)
+        if not records:
+            return np.empty(0, dtype=np.int64)
         
-        try:
-            processed_student = self.preprocessor.preprocess_data(student_df)
-            processed_student = processed_student[self.processed_data.columns]
-            encoded_student = self.autoencoder.encode(processed_student.values)
-            
-            # Calculate base similarity scores
-            base_similarities = cosine_similarity(encoded_student, self.encoded_features)[0]
-            
-            # Calculate penalties
-            penalties = self._calculate_penalties(student_data)
-            
-            # Adjust similarities based on penalties
+        X = self.preprocessor.feature_plan.encode_many(records)
+        encoded = self.encoder.encode(X)
+        if student_ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(records), dtype=np.int64)
+        else:
+            ids = np.asarray(student_ids, dtype=np.int64)
+            if len(ids) != len(records) or np.any(np.diff(ids) <= 0) or ids[0] < self._next_id:
+                raise ValueError("student_ids must be increasing and newer than existing ids")
+        
+        self._features.append(encoded)
+        self.index.add(encoded)
+        self.students.append(records)
+        self._student_ids.append(ids)
+        self._alive.append(np.ones(len(records), dtype=bool))
+        self._next_id = int(ids[-1]) + 1
+        self._publish()
+        
+        self.drift_monitor.update(reconstruction_errors(self.reconstructor, X))
+        return ids
+
+    def remove_students(self, student_ids):
+        """Tombstone students by id; compacts once enough are removed"""
+        student_ids = np.atleast_1d(np.asarray(student_ids, dtype=np.int64))
+        all_ids = self._student_ids.data
+        positions = np.searchsorted(all_ids, student_ids)
+        found = positions < len(all_ids)
+        found[found] = all_ids[positions[found]] == student_ids[found]
+        positions = np.unique(positions[found])
+        positions = positions[self._alive.data[positions]]
+        if not len(positions):
+            return 0
+        
+        # Copy on write, as the published Population shares the alive mask
+        alive = self._alive.data.copy()
+        alive[positions] = False
+        self._alive = GrowableArray(alive)
+        self._n_removed += len(positions)
+        if self._n_removed > self.compaction_threshold * len(self._alive):
+            self.compact()
+        else:
+            self._publish()
+        return len(positions)
+
+    def compact(self):
+        """Drop tombstoned students from all population arrays.
+
+        The arrays are compacted into new buffers, so the published
+        Population keeps reading the old ones until the compacted population
+        replaces it.
+        """
+        if not self._n_removed:
+            return
+        
+        keep = self._alive.data.copy()
+        self.students.compact(keep)
+        self._features.compact(keep)
+        self.index.compact(keep)
+        self._student_ids.compact(keep)
+        self._alive.compact(keep)
+        self._n_removed = 0
+        self._publish()
+
+    def share_memory(self, shared):
+        """Move the population arrays into shared memory (a SharedArrays).
+
+        Call this in the parent before forking serving workers, so they all
+        read the same physical pages instead of each holding a copy. Adding
+        students copies the arrays back out, so it only suits read-only
+        serving.
+        """
+        self.compact()
+        arrays = {'features': self._features, 'student_ids': self._student_ids, 'alive': self._alive}
+        arrays.update({f'students.{name}': array for name, array in self.students.arrays().items()})
+        arrays.update({f'index.{name}': array for name, array in self.index.arrays().items()})
+        for name, array in arrays.items():
+            array.rebind(shared.put(name, array.data))
+        self._publish()
+        return shared
+
+    def population_snapshot(self):
+        """Copy of the live students and their ids, e.g. for retraining.
+
+        Tombstoned students are filtered out rather than compacted away, so
+        taking a snapshot does not modify the population being served.
+        """
+        population = self.population
+        frame = population.students.to_frame()[population.alive].reset_index(drop=True)
+        return frame, population.alive_student_ids()
+
+    def alive_student_ids(self):
+        return self.population.alive_student_ids()
+
+    def assign_student_ids(self, student_ids):
+        """Replace the ids of the current population (in position order)"""
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        if len(student_ids) != len(self._student_ids) or np.any(np.diff(student_ids) <= 0):
+            raise ValueError("Need one increasing id per student")
+        self._student_ids = GrowableArray(student_ids.copy())
+        self._next_id = int(student_ids[-1]) + 1 if len(student_ids) else 0
+        self._publish()
+
+    @property
+    def candidate_filter(self):
+        """Inverted indexes for hard constraints over the current population"""
+        return self.population.candidate_filter
+
+    def _score_candidates(self, population, student_data, pool_size, constraints=None):
+        """Encode a student and score its candidates in a Population.
+
+        Returns (candidate_ids, adjusted_similarities, base_similarities,
+        penalties); removed students score -inf. pool_size is the least
+        number of candidates taken from an index with a candidate_pool.
+        """
+        metrics = self.instrumentation
+        # Encode the student with the compiled feature plan (no pandas)
+        with metrics.stage('preprocess'):
+            processed_student = self.preprocessor.transform_record(student_data)
+        with metrics.stage('encode'):
+            encoded_student = self.encoder.encode(processed_student[None, :])
+        
+        # Calculate base similarity scores against the students passing
+        # the constraints, everyone, or the index's candidate shortlist
+        if constraints:
+            with metrics.stage('filter'):
+                candidate_ids = population.candidate_filter.candidates(student_data, **constraints)
+            with metrics.stage('similarity'):
+                base_similarities = population.index.similarities(encoded_student, ids=candidate_ids)[0]
+            with metrics.stage('penalties'):
+                penalties = population.penalty_engine.calculate(student_data, ids=candidate_ids)
+        elif self.candidate_pool is None:
+            candidate_ids = np.arange(len(population))
+            with metrics.stage('similarity'):
+                base_similarities = population.index.similarities(encoded_student)[0]
+            with metrics.stage('penalties'):
+                penalties = population.penalty_engine.calculate(student_data)
+        else:
+            with metrics.stage('similarity'):
+                candidate_ids, base_similarities = population.index.search(
+                    encoded_student, max(self.candidate_pool, pool_size)
+                )
+            candidate_ids, base_similarities = candidate_ids[0], base_similarities[0]
+            with metrics.stage('penalties'):
+                penalties = population.penalty_engine.calculate(student_data, ids=candidate_ids)
+        
+        # Adjust similarities based on penalties (callers time their own top_k)
+        with metrics.stage('adjust'):
             adjusted_similarities = base_similarities - penalties
+            if population.n_removed:
+                adjusted_similarities[~population.alive[candidate_ids]] = -np.inf
+        return candidate_ids, adjusted_similarities, base_similarities, penalties
+
+    def find_matches(self, student_data, top_n=5, constraints=None, fields=None):
+        """Find top matches for a given student with improved matching logic.
+
+        constraints optionally gives hard constraints (see CONSTRAINTS in
+        src.models.filtering, e.g. {'max_age_gap': 2, 'same_region': True});
+        only the students satisfying all of them are scored. fields limits
+        each match to those MATCH_FIELDS; the others are not computed.
+        """
+        metrics = self.instrumentation
+        if logger.isEnabledFor(logging.DEBUG) and metrics.should_log():
+            logger.debug("Matching student %s", student_data.get('Child_Nickname'))
+        
+        try:
+            population = self.population
+            candidate_ids, adjusted_similarities, base_similarities, penalties = \
+                self._score_candidates(population, student_data, top_n, constraints)
+            with metrics.stage('top_k'):
+                top_positions = top_k_indices(adjusted_similarities, top_n)
+                top_positions = top_positions[np.isfinite(adjusted_similarities[top_positions])]
             
-            # Get top matches
-            top_indices = np.argsort(adjusted_similarities)[-top_n:][::-1]
-            
-            matches = []
-            for idx in top_indices:
-                match_info = {
-                    'student': {
-                        key: int(value) if isinstance(value, np.integer) else float(value) if isinstance(value, np.floating) else value
-                        for key, value in self.original_data.iloc[idx].to_dict().items()
-                    },
-                    'similarity_score': float(adjusted_similarities[idx]),
-                    'base_similarity': float(base_similarities[idx]),
-                    'penalty': float(penalties[idx]),
-                    'age_difference': int(abs(student_data['Child_Age'] - self.original_data.iloc[idx]['Child_Age'])),
-                    'shared_interests': self._get_shared_interests(student_data, self.original_data.iloc[idx]),
-                    'overlapping_availability': self._get_overlapping_availability(student_data, self.original_data.iloc[idx])
-                }
-                matches.append(match_info)
+            with metrics.stage('explanation'):
+                matches = self._build_matches(
+                    population, student_data, candidate_ids[top_positions],
+                    adjusted_similarities[top_positions], base_similarities[top_positions],
+                    penalties[top_positions], fields
+                )
             
+            metrics.inc('matching_requests_total')
             return matches
             
-        except Exception as e:
-            print(f"Error in find_matches: {str(e)}")
+        except Exception:
+            metrics.inc('matching_errors_total')
+            logger.exception("Error in find_matches")
             raise
+
+    def rank_matches(self, student_data, constraints=None, max_depth=1000):
+        """Rank a student's candidates for paging through with MatchRanking.page().
+
+        Only the best max_depth candidates are kept, and they are sorted
+        lazily as deeper pages are read.
+        """
+        metrics = self.instrumentation
+        try:
+            population = self.population
+            candidate_ids, adjusted_similarities, base_similarities, penalties = \
+                self._score_candidates(population, student_data, max_depth, constraints)
+            with metrics.stage('top_k'):
+                ranking = MatchRanking(candidate_ids, adjusted_similarities, base_similarities,
+                                       penalties, max_depth=max_depth, population=population)
+            metrics.inc('matching_requests_total')
+            return ranking
+        except Exception:
+            metrics.inc('matching_errors_total')
+            logger.exception("Error in rank_matches")
+            raise
+
+    def rank_matches_cached(self, student_data, cache, model_version=None, constraints=None,
+                            max_depth=1000, ranker=None):
+        """rank_matches behind a ResultCache, keyed and invalidated like find_matches_cached.
+
+        ranker(student_data, max_depth=...) computes unconstrained misses and
+        defaults to rank_matches.
+        """
+        key = self.students.profile_key(student_data)
+        if key is not None:
+            key = ('ranking', key, max_depth, tuple(sorted((constraints or {}).items())))
+        if constraints:
+            compute = lambda: self.rank_matches(student_data, constraints=constraints, max_depth=max_depth)
+        else:
+            ranker = ranker or self.rank_matches
+            compute = lambda: ranker(student_data, max_depth=max_depth)
+        return cache.get_or_compute(key, (model_version, self.population_version), compute)
+
+    def matches_page(self, student_data, ranking, offset=0, limit=5, fields=None):
+        """Matches ranked offset to offset + limit in a ranking from rank_matches()"""
+        with self.instrumentation.stage('explanation'):
+            return self._build_matches(ranking.population, student_data, *ranking.page(offset, limit), fields)
     
-    def _get_shared_interests(self, student1, student2):
-        """Get list of shared interests between two students"""
-        base_interests = [
-            'Science',
-            'Coding/Game Design',
-            'Reading/Writing',
-            'Engineering',
-            'Art',
-            'Music',
-            'Math'
+    def find_matches_cached(self, student_data, cache, top_n=5, model_version=None, constraints=None):
+        """find_matches behind a ResultCache keyed on the student's profile.
+
+        Entries are tied to model_version and the population version, so
+        they are dropped as soon as either changes.
+        """
+        key = self.students.profile_key(student_data)
+        if key is not None:
+            key = (key, top_n, tuple(sorted((constraints or {}).items())))
+        return cache.get_or_compute(
+            key, (model_version, self.population_version),
+            lambda: self.find_matches(student_data, top_n=top_n, constraints=constraints)
+        )
+
+    def _build_match(self, population, student_data, idx, similarity_score, base_similarity,
+                     penalty, query_masks=None, fields=None):
+        """Build the response entry for the student at position idx of a Population,
+        with only the given fields"""
+        students = population.students
+        masks = lambda: query_masks or students.query_masks(student_data)
+        values = {
+            'student_id': lambda: int(population.student_ids[idx]),
+            'student': lambda: students.record(idx),
+            'similarity_score': lambda: float(similarity_score),
+            'base_similarity': lambda: float(base_similarity),
+            'penalty': lambda: float(penalty),
+            'age_difference': lambda: int(abs(student_data['Child_Age'] - int(students.ages[idx]))),
+            'shared_interests': lambda: students.shared_interests(masks()[1], idx),
+            'overlapping_availability': lambda: students.overlapping_availability(masks()[0], idx),
+        }
+        return {field: values[field]() for field in (MATCH_FIELDS if fields is None else fields)}
+
+    def _build_matches(self, population, student_data, ids, scores, base_similarities, penalties,
+                       fields=None):
+        fields = MATCH_FIELDS if fields is None else fields
+        query_masks = None
+        if 'shared_interests' in fields or 'overlapping_availability' in fields:
+            query_masks = population.students.query_masks(student_data)
+        return [
+            self._build_match(population, student_data, idx, score, base, penalty, query_masks, fields)
+            for idx, score, base, penalty in zip(ids, scores, base_similarities, penalties)
         ]
+
+    def encode_students(self, students_df):
+        """Encode a DataFrame of students with a single encoder call"""
+        processed = self.preprocessor.preprocess_data(students_df.reset_index(drop=True))
+        return self.encoder.encode(processed[self.feature_columns].values)
+
+    def _score_batch(self, students, depth, query_block, population_block, query_ids):
+        """Yield (population, records, ids, scores, base, penalties) for each block of queries.
+
+        Each block of query_block students is encoded in one encoder call,
+        then scored against the population in (query_block x population_block)
+        tiles while keeping a running top-depth per query, so memory stays
+        bounded for any roster size. With a candidate_pool, each query is
+        instead scored against its index shortlist, like find_matches. The
+        arrays hold one row per query, best first, and are -inf scored where
+        fewer than depth candidates exist.
+        """
+        metrics = self.instrumentation
+        if isinstance(students, pd.DataFrame):
+            students = students.reset_index(drop=True)
+        population = self.population
+        vectors = population.index.vectors
+        n_population = len(population)
         
-        shared = []
-        print("\nDebug: Checking shared interests")
-        print("Student1 interests:")
-        for k, v in student1.items():
-            if k.startswith('Interest_') and v == 'Selected':
-                print(f"- {k}: {v}")
-        print("\nStudent2 interests:")
-        for k, v in student2.items():
-            if k.startswith('Interest_') and v == 'Selected':
-                print(f"- {k}: {v}")
-        
-        for interest in base_interests:
-            column_name = f"Interest_{interest.replace('/', '_')}"
-            try:
-                value1 = student1[column_name]
-                value2 = student2[column_name]
-                print(f"\nChecking interest: {interest}")
-                print(f"Column name: {column_name}")
-                print(f"Student1 value: {value1}")
-                print(f"Student2 value: {value2}")
-                
-                if (value1 == 'Selected' and value2 == 'Selected'):
-                    shared.append(interest)
-                    print(f"Added to shared interests: {interest}")
-            except KeyError as e:
-                print(f"Warning: Interest column not found: {column_name}")
-                print(f"Available columns in student1: {sorted([k for k in student1.keys() if k.startswith('Interest_')])}")
-                print(f"Available columns in student2: {sorted([k for k in student2.keys() if k.startswith('Interest_')])}")
-                continue
-        
-        print(f"\nFinal shared interests: {shared}")
-        return shared
-    
-    def _get_overlapping_availability(self, student1, student2):
-        """Get overlapping availability times between two students"""
-        availability_cols = [col for col in self.original_data.columns 
-                            if col.startswith('Available_Time_')]
-        overlapping = []
-        
-        for col in availability_cols:
-            try:
-                if (student1[col] == 'Available' and 
-                    student2[col] == 'Available'):
-                    time_slot = col.replace('Available_Time_', '')
-                    overlapping.append(time_slot)
-            except KeyError as e:
-                print(f"Warning: Availability column not found: {col}")
+        for q_start in range(0, len(students), query_block):
+            if isinstance(students, pd.DataFrame):
+                records = students.iloc[q_start:q_start + query_block].to_dict('records')
+            else:
+                records = students[q_start:q_start + query_block]
+            n_queries = len(records)
+            with metrics.stage('batch_encode'):
+                processed = self.preprocessor.feature_plan.encode_many(records)
+                block_queries = normalize_rows(self.encoder.encode(processed))
+                packed_queries = population.penalty_engine.encode_queries(records)
+            
+            if self.candidate_pool is not None:
+                with metrics.stage('batch_score'):
+                    scored = self._score_shortlists(population, block_queries, packed_queries, depth,
+                                                    query_ids, q_start)
+                metrics.inc('matching_batch_queries_total', n_queries)
+                yield (population, records) + scored
                 continue
+            
+            best_ids = np.empty((n_queries, 0), dtype=np.int64)
+            best_scores = np.empty((n_queries, 0))
+            best_base = np.empty((n_queries, 0))
+            best_penalties = np.empty((n_queries, 0))
+            with metrics.stage('batch_score'):
+                for p_start in range(0, n_population, population_block):
+                    tile_ids = np.arange(p_start, min(p_start + population_block, n_population))
+                    base = block_queries @ vectors[tile_ids].T
+                    penalties = population.penalty_engine.calculate_encoded(packed_queries, ids=tile_ids)
+                    adjusted = base - penalties
+                    if population.n_removed:
+                        adjusted[:, ~population.alive[tile_ids]] = -np.inf
+                    if query_ids is not None:
+                        own = np.asarray(query_ids[q_start:q_start + n_queries])[:, None]
+                        adjusted[own == tile_ids[None, :]] = -np.inf
                 
-        return overlapping 
\ No newline at end of file
+                    # Merge the tile's own top-depth into the running top-depth
+                    tile_top = top_k_indices(adjusted, depth)
+                    ids = np.concatenate([best_ids, tile_ids[tile_top]], axis=1)
+                    scores = np.concatenate([best_scores, np.take_along_axis(adjusted, tile_top, axis=1)], axis=1)
+                    bases = np.concatenate([best_base, np.take_along_axis(base, tile_top, axis=1)], axis=1)
+                    pens = np.concatenate([best_penalties, np.take_along_axis(penalties, tile_top, axis=1)], axis=1)
+                    keep = top_k_indices(scores, depth)
+                    best_ids = np.take_along_axis(ids, keep, axis=1)
+                    best_scores = np.take_along_axis(scores, keep, axis=1)
+                    best_base = np.take_along_axis(bases, keep, axis=1)
+                    best_penalties = np.take_along_axis(pens, keep, axis=1)
+            metrics.inc('matching_batch_queries_total', n_queries)
+            yield population, records, best_ids, best_scores, best_base, best_penalties
+
+    def _score_shortlists(self, population, block_queries, packed_queries, depth, query_ids, q_start):
+        """Score a block of queries against their index shortlists, best first"""
+        ids, base = population.index.search(block_queries, max(self.candidate_pool, depth))
+        base = base.astype(np.float64)
+        penalties = population.penalty_engine.calculate_encoded(packed_queries, ids=ids)
+        adjusted = base - penalties
+        if population.n_removed:
+            adjusted[~population.alive[ids]] = -np.inf
+        if query_ids is not None:
+            own = np.asarray(query_ids[q_start:q_start + len(ids)])[:, None]
+            adjusted[own == ids] = -np.inf
+        keep = top_k_indices(adjusted, depth)
+        return tuple(np.take_along_axis(values, keep, axis=1) for values in (ids, adjusted, base, penalties))
+
+    def iter_matches_batch(self, students, top_n=5, query_block=256,
+                           population_block=16384, query_ids=None):
+        """Yield the top matches of each student, in order.
+
+        students is a DataFrame or a list of student dicts, scored in blocks
+        of query_block students against population_block students at a time,
+        or against their index shortlists when a candidate_pool is set.
+        query_ids optionally gives each query's own population position so a
+        student is never matched with itself.
+        """
+        for population, records, *scored in self._score_batch(students, top_n, query_block,
+                                                               population_block, query_ids):
+            for student_data, ids, scores, base, penalties in zip(records, *scored):
+                query_masks = population.students.query_masks(student_data)
+                yield [
+                    self._build_match(population, student_data, idx, score, base_similarity, penalty, query_masks)
+                    for idx, score, base_similarity, penalty in zip(ids, scores, base, penalties)
+                    if np.isfinite(score)
+                ]
+
+    def rank_matches_batch(self, students, max_depth=1000, query_block=256, population_block=16384):
+        """rank_matches for every student in a DataFrame or list of dicts, scored like
+        iter_matches_batch; returns one MatchRanking per student"""
+        rankings = []
+        for population, records, *scored in self._score_batch(students, max_depth, query_block,
+                                                               population_block, None):
+            rankings.extend(MatchRanking(*arrays, max_depth=max_depth, population=population)
+                            for arrays in zip(*scored))
+        return rankings
+
+    def find_matches_batch(self, students, top_n=5, **kwargs):
+        """Find top matches for every student in a DataFrame or list of dicts"""
+        return list(self.iter_matches_batch(students, top_n=top_n, **kwargs))
@@ -0,0 +1,102 @@
+# src/models/numpy_encoder.py
+import numpy as np
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'linear': lambda x: x,
+}
+
+
+def _quantize_int8(W):
+    """Symmetric per-output-column int8 quantization"""
+    scale = np.abs(W).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(W / scale).astype(np.int8), scale.astype(np.float32)
+
+
+class NumpyEncoder:
+    """Inference-only encoder running the Dense layers as plain matmuls.
+
+    Lets the matching system encode students without importing TensorFlow.
+    The full autoencoder can be exported the same way to measure
+    reconstruction error.
+    Weights can be kept as float32, float16 or int8; reduced precision
+    shrinks the stored weights, computation always runs in float32.
+    """
+
+    def __init__(self, layers, precision='float32'):
+        # layers: [(kernel, bias, activation)]
+        self.precision = precision
+        self.activations = [activation for _, _, activation in layers]
+        self.biases = [np.asarray(b, dtype=np.float32) for _, b, _ in layers]
+        self.kernels = []
+        self.scales = []
+        for W, _, _ in layers:
+            W = np.asarray(W, dtype=np.float32)
+            if precision == 'float32':
+                self.kernels.append(W)
+                self.scales.append(None)
+            elif precision == 'float16':
+                self.kernels.append(W.astype(np.float16))
+                self.scales.append(None)
+            elif precision == 'int8':
+                W_q, scale = _quantize_int8(W)
+                self.kernels.append(W_q)
+                self.scales.append(scale)
+            else:
+                raise ValueError(f"Unsupported precision: {precision}")
+
+    @classmethod
+    def from_keras(cls, model, precision='float32'):
+        """Export the Dense layers of a Keras model"""
+        layers = []
+        for layer in model.layers:
+            weights = layer.get_weights()
+            if not weights:
+                continue
+            kernel, bias = weights
+            layers.append((kernel, bias, layer.get_config()['activation']))
+        return cls(layers, precision=precision)
+
+    @property
+    def input_dim(self):
+        return self.kernels[0].shape[0]
+
+    @property
+    def output_dim(self):
+        return self.kernels[-1].shape[1]
+
+    def encode(self, X):
+        """Run the forward pass on a (n_samples, input_dim) array"""
+        X = np.asarray(X, dtype=np.float32)
+        for W, b, scale, activation in zip(self.kernels, self.biases, self.scales, self.activations):
+            X = X @ W.astype(np.float32, copy=False)
+            if scale is not None:
+                X *= scale
+            X = ACTIVATIONS[activation](X + b)
+        return X
+
+    def save(self, path):
+        """Save the exported weights to a .npz file"""
+        arrays = {'precision': np.array(self.precision),
+                  'activations': np.array(self.activations)}
+        for i, (W, b, scale) in enumerate(zip(self.kernels, self.biases, self.scales)):
+            arrays[f'kernel_{i}'] = W
+            arrays[f'bias_{i}'] = b
+            if scale is not None:
+                arrays[f'scale_{i}'] = scale
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, precision=None):
+        """Load weights saved with save(), optionally re-quantizing them"""
+        with np.load(path) as data:
+            saved_precision = str(data['precision'])
+            layers = []
+            for i, activation in enumerate(data['activations']):
+                W = data[f'kernel_{i}'].astype(np.float32)
+                if f'scale_{i}' in data:
+                    W = W * data[f'scale_{i}']
+                layers.append((W, data[f'bias_{i}'], str(activation)))
+        return cls(layers, precision=precision or saved_precision)
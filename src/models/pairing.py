@@ -0,0 +1,301 @@
+# src/models/pairing.py
+import logging
+import time
+
+import numpy as np
+
+from src.models.retrieval import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+def mutual_scores(population, a, b):
+    """Symmetric compatibility of the students at positions a[i] and b[i] of a Population.
+
+    The cosine similarity of their codes minus the mean of the penalties
+    each one's preferences give the other, so a pair scores the same
+    whichever side is asked.
+    """
+    a = np.asarray(a)
+    b = np.asarray(b)
+    vectors = population.index.vectors
+    base = np.einsum('ij,ij->i', vectors[a], vectors[b], dtype=np.float64)
+    engine = population.penalty_engine
+    return base - 0.5 * (engine.calculate_pairs(a, b) + engine.calculate_pairs(b, a))
+
+
+def candidate_graph(population, positions, k=10, n_candidates=64, block=256):
+    """Sparse graph linking each cohort member to its k best partners.
+
+    Each student's n_candidates nearest codes within the cohort are
+    shortlisted with a blocked matrix product, rescored with mutual_scores
+    and cut to the best k. Returns (u, v, weight) edge arrays of indexes
+    into positions, with u < v and no duplicate edges.
+    """
+    positions = np.asarray(positions)
+    n = len(positions)
+    n_candidates = min(n_candidates, n - 1)
+    k = min(k, n_candidates)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    vectors = population.index.vectors[positions]
+    edges_u, edges_v, edges_w = [], [], []
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        similarities = vectors[rows] @ vectors.T
+        similarities[np.arange(len(rows)), rows] = -np.inf
+        shortlist = top_k_indices(similarities, n_candidates)
+
+        weights = mutual_scores(
+            population, positions[np.repeat(rows, n_candidates)], positions[shortlist.ravel()]
+        ).reshape(len(rows), n_candidates)
+        best = top_k_indices(weights, k)
+        edges_u.append(np.repeat(rows, k))
+        edges_v.append(np.take_along_axis(shortlist, best, axis=1).ravel())
+        edges_w.append(np.take_along_axis(weights, best, axis=1).ravel())
+
+    u, v, w = np.concatenate(edges_u), np.concatenate(edges_v), np.concatenate(edges_w)
+    low, high = np.minimum(u, v), np.maximum(u, v)
+    _, unique = np.unique(low * n + high, return_index=True)
+    return low[unique], high[unique], w[unique]
+
+
+def _greedy_groups(n, u, v, w, group_size):
+    """Merge students along edges, heaviest first, while groups stay within group_size.
+
+    Returns each student's group root (union-find over indexes 0..n-1).
+    """
+    parent = list(range(n))
+    size = [1] * n
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    u, v = u.tolist(), v.tolist()
+    for edge in np.argsort(-w, kind='stable').tolist():
+        a, b = find(u[edge]), find(v[edge])
+        if a != b and size[a] + size[b] <= group_size:
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] += size[b]
+    return np.array([find(x) for x in range(n)], dtype=np.int64)
+
+
+def _fill_groups(population, positions, group_size):
+    """Group leftover students by growing each group around a seed student"""
+    remaining = list(range(len(positions)))
+    groups = []
+    while len(remaining) >= group_size:
+        group = [remaining.pop(0)]
+        while len(group) < group_size:
+            others = np.asarray(remaining)
+            scores = sum(
+                mutual_scores(population, np.full(len(others), positions[member]), positions[others])
+                for member in group
+            )
+            group.append(remaining.pop(int(np.argmax(scores))))
+        groups.append(group)
+    return groups, remaining
+
+
+def _group_score(population, group):
+    """Sum of the mutual scores of every pair of students in a group"""
+    a, b = np.triu_indices(len(group), 1)
+    return float(mutual_scores(population, group[a], group[b]).sum())
+
+
+class _Groups:
+    """Fixed-size groups as an (n_groups, group_size) matrix of cohort indexes"""
+
+    def __init__(self, population, positions, members):
+        self.population = population
+        self.positions = positions
+        self.members = np.asarray(members, dtype=np.int64).reshape(len(members), -1)
+        # Students outside every group (leftovers) keep group -1
+        self.group_of = np.full(len(positions), -1, dtype=np.int64)
+        self.slot_of = np.full(len(positions), -1, dtype=np.int64)
+        self.affinity = np.zeros(len(positions))
+        self.refresh()
+
+    def scores(self, a, b):
+        return mutual_scores(self.population, self.positions[a], self.positions[b])
+
+    def sum_scores(self, students, groups):
+        """Total score of each students[i] with every member of groups[i]"""
+        members = self.members[groups]
+        return self.scores(np.repeat(students, members.shape[1]), members.ravel()).reshape(members.shape).sum(axis=1)
+
+    def refresh(self, groups=None):
+        """Recompute each member's summed score with the rest of its group"""
+        groups = np.arange(len(self.members)) if groups is None else groups
+        members = self.members[groups]
+        n_groups, size = members.shape
+        self.group_of[members.ravel()] = np.repeat(groups, size)
+        self.slot_of[members.ravel()] = np.tile(np.arange(size), n_groups)
+        a = np.repeat(members, size, axis=1).ravel()
+        b = np.tile(members, size).ravel()
+        pair_scores = self.scores(a, b).reshape(n_groups, size, size)
+        pair_scores[:, np.arange(size), np.arange(size)] = 0.0
+        self.affinity[members] = pair_scores.sum(axis=2)
+
+    def objective(self):
+        return float(self.affinity[self.members].sum() / 2)
+
+    def improve(self, u, v, max_passes=10, tol=1e-9):
+        """Swap students between groups while it raises the objective.
+
+        For every candidate edge (a, b) across two groups, b moves into a's
+        group in exchange for one of a's group mates c. Each pass applies the
+        best non-overlapping improving swaps; returns the number of passes run.
+        """
+        grouped = (self.group_of[u] >= 0) & (self.group_of[v] >= 0)
+        a = np.concatenate([u[grouped], v[grouped]])
+        b = np.concatenate([v[grouped], u[grouped]])
+        size = self.members.shape[1]
+        for n_pass in range(1, max_passes + 1):
+            crossing = self.group_of[a] != self.group_of[b]
+            edge_a, edge_b = a[crossing], b[crossing]
+            if not len(edge_a):
+                return n_pass - 1
+            group_a, group_b = self.group_of[edge_a], self.group_of[edge_b]
+
+            # Every mate c of a is a candidate to trade places with b
+            swap_b = np.repeat(edge_b, size)
+            swap_c = self.members[group_a].ravel()
+            keep = swap_c != np.repeat(edge_a, size)
+            swap_b, swap_c = swap_b[keep], swap_c[keep]
+            into_a, into_b = np.repeat(group_a, size)[keep], np.repeat(group_b, size)[keep]
+
+            b_c = self.scores(swap_b, swap_c)
+            gains = (self.sum_scores(swap_b, into_a) - b_c - self.affinity[swap_c]
+                     + self.sum_scores(swap_c, into_b) - b_c - self.affinity[swap_b])
+
+            improving = np.flatnonzero(gains > tol)
+            touched = np.zeros(len(self.members), dtype=bool)
+            applied = []
+            for i in improving[np.argsort(-gains[improving], kind='stable')].tolist():
+                ga, gb = into_a[i], into_b[i]
+                if touched[ga] or touched[gb]:
+                    continue
+                touched[ga] = touched[gb] = True
+                b_slot, c_slot = self.slot_of[swap_b[i]], self.slot_of[swap_c[i]]
+                self.members[ga, c_slot], self.members[gb, b_slot] = swap_b[i], swap_c[i]
+                applied.append(i)
+            if not applied:
+                return n_pass - 1
+            self.refresh(np.flatnonzero(touched))
+            logger.debug("Pairing pass %d: %d swaps, gain %.4f", n_pass, len(applied), gains[applied].sum())
+        return max_passes
+
+
+def pair_cohort(system, student_ids=None, group_size=2, k=10, n_candidates=64,
+                max_rounds=5, max_passes=10, block=256):
+    """Split a cohort into groups of group_size maximizing total compatibility.
+
+    The objective is the sum, over every pair of students in the same group,
+    of their mutual_scores. The solver works on a sparse candidate graph of
+    each student's k best partners:
+
+    1. Groups are merged greedily along the heaviest edges (for pairs this is
+       the greedy maximum weight matching). Students left in incomplete
+       groups are regrouped on a fresh graph among themselves, for up to
+       max_rounds rounds, and whoever remains is grouped around seeds.
+    2. Local search swaps students between groups along graph edges while
+       the objective improves (2-opt for pairs).
+    3. When the cohort does not divide evenly, each leftover student joins
+       the group it scores best with, so nobody is left out. Groups take a
+       second leftover only once every group has taken one.
+
+    student_ids defaults to the whole live population. Returns the groups
+    (lists of student ids), the objective and the runtime of each phase.
+    """
+    if group_size < 2:
+        raise ValueError("group_size must be at least 2")
+    population = system.population
+    all_ids = population.student_ids
+    if student_ids is None:
+        positions = np.flatnonzero(population.alive)
+    else:
+        student_ids = np.unique(np.asarray(student_ids, dtype=np.int64))
+        positions = np.searchsorted(all_ids, student_ids)
+        found = positions < len(all_ids)
+        found[found] = all_ids[positions[found]] == student_ids[found]
+        found[found] = population.alive[positions[found]]
+        if not found.all():
+            raise ValueError(f"Unknown student ids: {student_ids[~found].tolist()[:10]}")
+    n = len(positions)
+    timings = {}
+    start = time.perf_counter()
+
+    # 1. Greedy grouping over the candidate graph, in rounds
+    groups, remaining = [], np.arange(n)
+    graph = None
+    graph_seconds = 0.0
+    rounds = 0
+    while len(remaining) >= group_size and rounds < max_rounds:
+        rounds += 1
+        graph_start = time.perf_counter()
+        u, v, w = candidate_graph(population, positions[remaining], k=k, n_candidates=n_candidates, block=block)
+        graph_seconds += time.perf_counter() - graph_start
+        if graph is None:
+            graph = (u, v)
+        roots = _greedy_groups(len(remaining), u, v, w, group_size)
+        _, labels, counts = np.unique(roots, return_inverse=True, return_counts=True)
+        complete = counts[labels] == group_size
+        if not complete.any():
+            break
+        order = np.argsort(labels[complete], kind='stable')
+        groups.extend(remaining[complete][order].reshape(-1, group_size).tolist())
+        remaining = remaining[~complete]
+    filled, leftover = _fill_groups(population, positions[remaining], group_size)
+    groups.extend(remaining[group].tolist() for group in filled)
+    leftover = remaining[leftover]
+    timings['graph_seconds'] = graph_seconds
+    timings['grouping_seconds'] = time.perf_counter() - start - graph_seconds
+
+    # 2. Local search over the first round's graph
+    improve_start = time.perf_counter()
+    grouped = _Groups(population, positions, groups) if groups else None
+    greedy_objective = grouped.objective() if grouped else 0.0
+    passes = 0
+    if grouped is not None and graph is not None and max_passes:
+        passes = grouped.improve(*graph, max_passes=max_passes)
+    timings['improve_seconds'] = time.perf_counter() - improve_start
+
+    # 3. Spread the students that did not fill a group over the best groups
+    groups = grouped.members.tolist() if grouped else []
+    if len(leftover) and not groups:
+        groups.append(leftover.tolist())
+    elif len(leftover):
+        open_groups = np.arange(len(groups))
+        for student in leftover.tolist():
+            # More leftovers than groups (e.g. 7 students in groups of 4)
+            if not len(open_groups):
+                open_groups = np.arange(len(groups))
+            totals = grouped.sum_scores(np.full(len(open_groups), student), open_groups)
+            best = int(np.argmax(totals))
+            groups[open_groups[best]].append(student)
+            open_groups = np.delete(open_groups, best)
+
+    group_scores = [_group_score(population, positions[group]) for group in groups]
+    n_pairs = sum(len(group) * (len(group) - 1) // 2 for group in groups)
+    objective = float(sum(group_scores))
+    timings['total_seconds'] = time.perf_counter() - start
+    return {
+        'groups': [all_ids[positions[group]].tolist() for group in groups],
+        'group_scores': group_scores,
+        'n_students': int(n),
+        'group_size': group_size,
+        'objective': objective,
+        'greedy_objective': greedy_objective,
+        'mean_pair_score': objective / n_pairs if n_pairs else None,
+        'rounds': rounds,
+        'improvement_passes': passes,
+        'n_edges': 0 if graph is None else int(len(graph[0])),
+        'timings': timings,
+    }
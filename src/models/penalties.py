@@ -0,0 +1,246 @@
+# src/models/penalties.py
+import numpy as np
+import pandas as pd
+from src.data.student_store import popcount
+
+BINARY_GENDERS = ('Male', 'Female')
+UNDISCLOSED_GENDER = 'Prefer not to say'
+
+
+def gender_penalty(gender1, gender2):
+    """Penalty factor for a pair of genders, before applying importance"""
+    if gender1 == gender2:
+        return 0.0
+    if gender1 in BINARY_GENDERS and gender2 in BINARY_GENDERS:
+        # Binary gender mismatch
+        return 0.3
+    if UNDISCLOSED_GENDER in (gender1, gender2):
+        # One student prefers not to say
+        return 0.1
+    # Other gender combinations
+    return 0.2
+
+
+def _fill_broadcast(values, mask, fill):
+    """values[mask] = fill for a mask broadcasting to values, without expanding it.
+
+    Along the mask's length-1 axes every entry is set, so a (1, n) mask
+    fills whole columns and an (n, 1) mask whole rows.
+    """
+    index = tuple(
+        slice(None) if size == 1 else hits
+        for size, hits in zip(mask.shape, np.nonzero(mask))
+    )
+    values[index] = fill
+
+
+def penalty_terms(queries, targets, gender_terms):
+    """Sum of the age, gender, time and region penalties of pairs of students.
+
+    queries and targets hold the packed fields of the two sides (see
+    PenaltyEngine.encode_queries; the importances are the query's), shaped
+    to broadcast against each other: (n_queries, 1) against
+    (1, n_population) for a grid of pairs, or (n_pairs,) against (n_pairs,).
+    gender_terms is each pair's gender penalty, already weighted.
+    """
+    # The terms are accumulated in place to keep full-size temporaries to a
+    # minimum; this dominates the cost of matching.
+
+    # Age difference penalty, normalized by the 10 year range of ages 3-13
+    penalties = np.subtract(queries['ages'], targets['ages'], dtype=np.float64)
+    np.abs(penalties, out=penalties)
+    penalties /= 10.0
+    penalties *= queries['age_importance']
+    penalties *= 0.5
+
+    # Gender matching penalty
+    penalties += gender_terms
+
+    # Time overlap penalty; a fixed penalty when either side has no availability
+    time_importance = queries['time_importance']
+    overlapping = popcount(queries['availability'] & targets['availability'])
+    shared_denominator = np.minimum(queries['availability_counts'], targets['availability_counts'])
+    np.maximum(shared_denominator, 1, out=shared_denominator)
+    time_penalties = np.divide(overlapping, shared_denominator)
+    np.subtract(1, time_penalties, out=time_penalties)
+    time_penalties *= 0.3
+    for counts in (queries['availability_counts'], targets['availability_counts']):
+        no_availability = counts == 0
+        if no_availability.any():
+            _fill_broadcast(time_penalties, no_availability, 0.5)
+    time_penalties *= time_importance
+    penalties += time_penalties
+
+    # Additional penalty for different regions (time zone consideration)
+    different_region = queries['region_codes'] != targets['region_codes']
+    penalties += different_region * (0.15 * time_importance)
+
+    return penalties
+
+
+class PenaltyEngine:
+    """Columnar penalty calculation over the whole student population.
+
+    Penalties are computed from the packed arrays of a StudentStore (ages,
+    gender/region codes, availability bitmasks and their popcounts), so
+    scoring a query is a handful of vectorized operations instead of a
+    Python loop over rows.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.store = None
+
+    def fit(self, store):
+        """Compute penalties against the students of a StudentStore"""
+        self.store = store
+        return self
+
+    @property
+    def availability_cols(self):
+        return self.store.availability_cols
+
+    @property
+    def gender_vocab(self):
+        return self.store.vocabulary('Child_Gender')
+
+    @property
+    def region_vocab(self):
+        return self.store.vocabulary('Child_Region')
+
+    @property
+    def ages(self):
+        return self.store.ages
+
+    @property
+    def gender_codes(self):
+        return self.store.codes('Child_Gender')
+
+    @property
+    def region_codes(self):
+        return self.store.codes('Child_Region')
+
+    @property
+    def availability(self):
+        return self.store.availability
+
+    @property
+    def availability_counts(self):
+        return self.store.availability_counts
+
+    def __len__(self):
+        return 0 if self.store is None else len(self.store)
+
+    def encode_queries(self, students):
+        """Pack the penalty-relevant fields of a DataFrame or list of student dicts"""
+        if isinstance(students, pd.DataFrame):
+            column = lambda col: students[col].values
+        else:
+            column = lambda col: np.array([student[col] for student in students], dtype=object)
+
+        masks = np.zeros(len(students), dtype=np.uint32)
+        for bit, col in enumerate(self.availability_cols):
+            masks |= (column(col) == 'Available').astype(np.uint32) << np.uint32(bit)
+
+        gender_vocab, gender_idx = np.unique(
+            column('Child_Gender').astype(str), return_inverse=True
+        )
+        gender_table = np.array([
+            [gender_penalty(query_gender, gender) for gender in self.gender_vocab]
+            for query_gender in gender_vocab
+        ])
+
+        # Regions not seen at fit time get code -1 and never match
+        region_lookup = {region: code for code, region in enumerate(self.region_vocab)}
+        region_codes = np.array([
+            region_lookup.get(region, -1) for region in column('Child_Region')
+        ], dtype=np.int64)
+
+        importance = lambda col: np.array([
+            self.weights.get(value, 0.5) for value in column(col)
+        ], dtype=np.float64)
+
+        return {
+            'ages': column('Child_Age').astype(np.float64),
+            'gender_penalties': gender_table.reshape(len(gender_vocab), -1)[gender_idx],
+            'region_codes': region_codes,
+            'availability': masks,
+            'availability_counts': popcount(masks),
+            'age_importance': importance('Preference_Similar_Age'),
+            'gender_importance': importance('Preference_Same_Gender'),
+            'time_importance': importance('Preference_Overlapping_Time'),
+        }
+
+    def calculate_batch(self, students, ids=None):
+        """Calculate penalties of several students against the population.
+
+        Returns a (n_students, n_population) matrix, or (n_students, len(ids))
+        if ids is given. Callers should bound the size of both dimensions.
+        """
+        return self.calculate_encoded(self.encode_queries(students), ids=ids)
+
+    def _pack_population(self, ids=None):
+        """The penalty-relevant arrays of the population (or of the students at ids)"""
+        packed = {
+            'ages': self.ages,
+            'gender_codes': self.gender_codes,
+            'region_codes': self.region_codes,
+            'availability': self.availability,
+            'availability_counts': self.availability_counts,
+        }
+        if ids is not None:
+            packed = {name: values[ids] for name, values in packed.items()}
+        return packed
+
+    def calculate_encoded(self, queries, ids=None):
+        """calculate_batch for queries already packed by encode_queries().
+
+        ids may also be an (n_queries, k) matrix giving each query its own
+        candidates (e.g. an index shortlist); the result is then aligned with it.
+        """
+        targets = self._pack_population(ids)
+        # Weighting the per-query gender table before looking up each
+        # student's code keeps it to one (n_queries, n_population) temporary.
+        # np.take returns it C-ordered like the other terms; [:, codes] would
+        # make it Fortran-ordered, which is much slower to add.
+        gender_weights = queries['gender_penalties'] * queries['gender_importance'][:, None]
+        if ids is not None and np.ndim(ids) == 2:
+            gender_terms = np.take_along_axis(gender_weights, targets['gender_codes'], axis=1)
+        else:
+            gender_terms = np.take(gender_weights, targets['gender_codes'], axis=1)
+            targets = {name: values[None, :] for name, values in targets.items()}
+        return penalty_terms(
+            {name: values[:, None] for name, values in queries.items() if name != 'gender_penalties'},
+            targets, gender_terms
+        )
+
+    def calculate_pairs(self, query_ids, target_ids):
+        """Penalties of population members towards other members, elementwise.
+
+        Entry i is the penalty the preferences of the student at position
+        query_ids[i] give the student at target_ids[i]; the same formula as
+        calculate_encoded, for arbitrary pairs instead of a full grid.
+        """
+        query_ids = np.asarray(query_ids)
+        queries = self._pack_population(query_ids)
+        targets = self._pack_population(target_ids)
+        for name, col in (('age_importance', 'Preference_Similar_Age'),
+                          ('gender_importance', 'Preference_Same_Gender'),
+                          ('time_importance', 'Preference_Overlapping_Time')):
+            importance = np.array([self.weights.get(value, 0.5) for value in self.store.vocabulary(col)])
+            queries[name] = importance[self.store.codes(col)[query_ids]]
+
+        gender_table = np.array([
+            [gender_penalty(query_gender, gender) for gender in self.gender_vocab]
+            for query_gender in self.gender_vocab
+        ]).reshape(len(self.gender_vocab), -1)
+        gender_terms = gender_table[queries['gender_codes'], targets['gender_codes']] * queries['gender_importance']
+        return penalty_terms(queries, targets, gender_terms)
+
+    def calculate(self, student_data, ids=None):
+        """Calculate penalties of a student against the population.
+
+        If ids is given, only those positions are scored and the result is
+        aligned with ids.
+        """
+        return self.calculate_batch([student_data], ids=ids)[0]
@@ -0,0 +1,43 @@
+# src/models/population.py
+from src.models.filtering import CandidateFilter
+from src.models.penalties import PenaltyEngine
+
+
+class Population:
+    """Read-only view of the student population at one moment.
+
+    StudentMatchingSystem publishes a new Population, in a single
+    assignment, after every change to its population. All of its arrays
+    hold the same n_students rows, and later appends and compactions never
+    write into those rows, so a reader that takes system.population once
+    scores and describes its matches against one consistent population
+    while students are being added and removed.
+    """
+
+    # Cached rankings keep a reference to the population they index into;
+    # without a __dict__ it does not count towards their cache size
+    __slots__ = ('version', 'students', 'index', 'student_ids', 'alive', 'n_removed',
+                 'penalty_engine', '_candidate_filter')
+
+    def __init__(self, version, students, index, student_ids, alive, n_removed, weights):
+        self.version = version
+        self.students = students
+        self.index = index
+        self.student_ids = student_ids
+        self.alive = alive
+        self.n_removed = n_removed
+        self.penalty_engine = PenaltyEngine(weights).fit(students)
+        self._candidate_filter = None
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    @property
+    def candidate_filter(self):
+        """Inverted indexes for hard constraints, built on first use"""
+        if self._candidate_filter is None:
+            self._candidate_filter = CandidateFilter(self.students, self.alive)
+        return self._candidate_filter
+
+    def alive_student_ids(self):
+        return self.student_ids[self.alive]
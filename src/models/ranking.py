@@ -0,0 +1,56 @@
+# src/models/ranking.py
+import threading
+
+import numpy as np
+
+
+class MatchRanking:
+    """The scored candidates of one query, sorted lazily as pages are read.
+
+    Only the prefix up to the deepest page requested so far is sorted. When
+    a page runs past it, the next best scores are selected from the unsorted
+    remainder with argpartition and sorted onto the prefix, growing it
+    geometrically, so reading further pages never re-scores the population.
+    With max_depth, only that many best candidates are kept at all. ids are
+    positions in population, the Population the candidates were scored in.
+    """
+
+    def __init__(self, ids, scores, base_similarities, penalties, max_depth=None, population=None):
+        keep = np.flatnonzero(np.isfinite(scores))
+        if max_depth is not None and len(keep) > max_depth:
+            keep = keep[np.argpartition(-scores[keep], max_depth - 1)[:max_depth]]
+        self.ids = np.asarray(ids)[keep]
+        self.scores = np.asarray(scores)[keep]
+        self.base_similarities = np.asarray(base_similarities)[keep]
+        self.penalties = np.asarray(penalties)[keep]
+        self.population = population
+        self.n_sorted = 0
+        # Rankings are shared between request threads through the cache
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _sort_to(self, depth):
+        depth = min(max(depth, 2 * self.n_sorted), len(self))
+        if depth <= self.n_sorted:
+            return
+        start, k = self.n_sorted, depth - self.n_sorted
+        rest = self.scores[start:]
+        if k < len(rest):
+            order = np.argpartition(-rest, k - 1)
+        else:
+            order = np.arange(len(rest))
+        order[:k] = order[:k][np.argsort(-rest[order[:k]], kind='stable')]
+        for array in (self.ids, self.scores, self.base_similarities, self.penalties):
+            array[start:] = array[start:][order]
+        self.n_sorted = depth
+
+    def page(self, offset, limit):
+        """(ids, scores, base similarities, penalties) ranked offset to offset + limit"""
+        with self._lock:
+            if offset + limit > self.n_sorted:
+                self._sort_to(offset + limit)
+        window = slice(offset, min(offset + limit, len(self)))
+        return (self.ids[window], self.scores[window],
+                self.base_similarities[window], self.penalties[window])
@@ -0,0 +1,176 @@
+# src/models/retraining.py
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.models.matching_system import StudentMatchingSystem
+
+logger = logging.getLogger(__name__)
+
+
+def _train_snapshot(df, student_ids, directory, config, fit_kwargs):
+    """Fit a new matching system on a data snapshot (runs in a child process).
+
+    config holds the StudentMatchingSystem arguments of the served system,
+    so the retrained one is built the same way.
+    """
+    start = time.perf_counter()
+    system = StudentMatchingSystem(**config)
+    system.fit(df, **fit_kwargs)
+    system.assign_student_ids(student_ids)
+    system.save(directory)
+    return time.perf_counter() - start
+
+
+class ModelHandle:
+    """Versioned reference to the matching system currently being served.
+
+    Readers call current() once per request and keep using that system, so a
+    swap never affects requests already in flight. Writers that change the
+    population (add/remove students) hold lock, which swap() also takes, so
+    writers and swaps are serialized. Readers do not take it: they match
+    against the Population a system publishes after each change, which stays
+    consistent while later changes are made.
+    """
+
+    def __init__(self, system, version=1):
+        self.lock = threading.RLock()
+        self._current = (version, system)
+
+    def current(self):
+        """Return (version, system) as one consistent pair"""
+        return self._current
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    @property
+    def system(self):
+        return self._current[1]
+
+    def swap(self, system):
+        """Atomically replace the served system; returns the new version"""
+        with self.lock:
+            version = self._current[0] + 1
+            self._current = (version, system)
+            return version
+
+
+class RetrainingScheduler:
+    """Retrains the matching system in a separate process and hot swaps it in.
+
+    Training runs on a snapshot of the population, with the served system's
+    encoding, index and precision settings. Students added or removed while
+    training are replayed onto the new system before it is swapped in. Each
+    job's work directory is deleted once its model is loaded. The swapped-in
+    model lives in memory only: like added and removed students, it is lost
+    on restart, when the server loads the artifacts trained on its CSV again.
+    """
+
+    def __init__(self, handle, work_dir, fit_kwargs=None):
+        self.handle = handle
+        self.work_dir = work_dir
+        self.fit_kwargs = fit_kwargs or {}
+        self._executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn')
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._next_job = 0
+        self.metrics = {
+            'retrains_started': 0,
+            'retrains_completed': 0,
+            'retrains_failed': 0,
+            'last_training_seconds': None,
+            'last_swap_seconds': None,
+            'last_error': None,
+        }
+
+    @property
+    def queue_depth(self):
+        """Retrains submitted but not yet swapped in (running or waiting)"""
+        return self._pending
+
+    def status(self):
+        return dict(self.metrics, queue_depth=self.queue_depth, model_version=self.handle.version)
+
+    def request_retrain(self):
+        """Snapshot the served population and queue a retrain on it"""
+        with self.handle.lock:
+            system = self.handle.system
+            df, student_ids = system.population_snapshot()
+            snapshot_next_id = system._next_id
+            config = {
+                'encoding_dim': system.encoding_dim,
+                'index_backend': system.index_backend,
+                'index_params': system.index_params,
+                'candidate_pool': system.candidate_pool,
+                'encoder_precision': system.encoder_precision,
+                'compaction_threshold': system.compaction_threshold,
+            }
+
+        with self._lock:
+            self._next_job += 1
+            self._pending += 1
+            self.metrics['retrains_started'] += 1
+            directory = os.path.join(self.work_dir, f'job_{self._next_job}')
+
+        future = self._executor.submit(_train_snapshot, df, student_ids, directory, config, self.fit_kwargs)
+        future.add_done_callback(
+            lambda f: self._finish(f, directory, config, student_ids, snapshot_next_id)
+        )
+        return future
+
+    def _finish(self, future, directory, config, snapshot_ids, snapshot_next_id):
+        try:
+            training_seconds = future.result()
+            # Loaded fully into memory, so the job directory can go right away
+            new_system = StudentMatchingSystem.load(directory, mmap=False)
+            new_system.compaction_threshold = config['compaction_threshold']
+
+            swap_start = time.perf_counter()
+            with self.handle.lock:
+                self._catch_up(self.handle.system, new_system, snapshot_ids, snapshot_next_id)
+                version = self.handle.swap(new_system)
+            swap_seconds = time.perf_counter() - swap_start
+
+            self.metrics['retrains_completed'] += 1
+            self.metrics['last_training_seconds'] = training_seconds
+            self.metrics['last_swap_seconds'] = swap_seconds
+            logger.info("Swapped in model version %d (trained in %.1fs, swap took %.1fms)",
+                        version, training_seconds, swap_seconds * 1000)
+        except Exception as e:
+            self.metrics['retrains_failed'] += 1
+            self.metrics['last_error'] = str(e)
+            logger.exception("Error in background retraining")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _catch_up(old_system, new_system, snapshot_ids, snapshot_next_id):
+        """Replay population changes made on old_system since the snapshot"""
+        current_ids = old_system.alive_student_ids()
+
+        removed = np.setdiff1d(snapshot_ids, current_ids)
+        if len(removed):
+            new_system.remove_students(removed)
+
+        added_positions = np.flatnonzero(
+            (old_system._student_ids.data >= snapshot_next_id) & old_system._alive.data
+        )
+        if len(added_positions):
+            rows = [old_system.students.record(idx) for idx in added_positions]
+            new_system.add_students(rows, student_ids=old_system._student_ids.data[added_positions])
+        new_system._next_id = max(new_system._next_id, old_system._next_id)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
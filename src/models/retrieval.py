@@ -0,0 +1,244 @@
+# src/models/retrieval.py
+import copy
+
+import numpy as np
+from src.utils.growable import GrowableArray
+
+
+def normalize_rows(X):
+    """L2-normalize rows, leaving all-zero rows untouched (like sklearn)"""
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def subset_similarities(queries, vectors, ids=None):
+    """Similarities of normalized queries to vectors, or only to vectors[ids].
+
+    Gathering rows costs more than scoring them, so large subsets are scored
+    in full and then selected.
+    """
+    if ids is None:
+        return queries @ vectors.T
+    if len(ids) * 4 > len(vectors):
+        return (queries @ vectors.T)[:, ids]
+    return queries @ vectors[ids].T
+
+
+def top_k_indices(scores, k):
+    """Indices of the k largest scores, best first, without a full sort"""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < scores.shape[-1]:
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape).copy()
+    part_scores = np.take_along_axis(scores, part, axis=-1)
+    order = np.argsort(-part_scores, axis=-1, kind='stable')
+    return np.take_along_axis(part, order, axis=-1)
+
+
+class ExactIndex:
+    """Brute-force cosine index over a pre-normalized feature matrix"""
+
+    def __init__(self, batch_size=1024):
+        self.batch_size = batch_size
+        self._vectors = None
+
+    def build(self, features):
+        self._vectors = GrowableArray(normalize_rows(features))
+        return self
+
+    @property
+    def vectors(self):
+        return self._vectors.data
+
+    def __len__(self):
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def add(self, features):
+        """Append vectors; their ids continue after the existing ones"""
+        self._vectors.append(normalize_rows(features))
+
+    def compact(self, keep):
+        """Drop the vectors where the boolean mask keep is False"""
+        self._vectors.compact(keep)
+
+    def view(self):
+        """Index over the current vectors only, unaffected by later adds and compactions"""
+        view = copy.copy(self)
+        view._vectors = GrowableArray(self.vectors)
+        return view
+
+    def arrays(self):
+        """The index's GrowableArrays, by name"""
+        return {'vectors': self._vectors}
+
+    def similarities(self, queries, ids=None):
+        """Cosine similarity of each query against every indexed vector (or those in ids)"""
+        queries = normalize_rows(np.atleast_2d(queries))
+        return subset_similarities(queries, self.vectors, ids)
+
+    def search(self, queries, k):
+        """Return (ids, similarities) of the k most similar vectors per query"""
+        queries = normalize_rows(np.atleast_2d(queries))
+        k = min(k, len(self))
+        ids = np.empty((len(queries), k), dtype=np.int64)
+        sims = np.empty((len(queries), k), dtype=np.float32)
+        for start in range(0, len(queries), self.batch_size):
+            block = queries[start:start + self.batch_size] @ self.vectors.T
+            block_ids = top_k_indices(block, k)
+            ids[start:start + len(block)] = block_ids
+            sims[start:start + len(block)] = np.take_along_axis(block, block_ids, axis=1)
+        return ids, sims
+
+
+class IVFIndex:
+    """Approximate inverted-file index using spherical k-means clustering.
+
+    Vectors are bucketed by their nearest centroid; a query is only compared
+    against the vectors in its n_probe closest buckets.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, max_train_points=50000, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.max_train_points = max_train_points
+        self.seed = seed
+        self._vectors = None
+        self._labels = None
+        self.centroids = None
+        self._lists = None
+
+    @property
+    def vectors(self):
+        return self._vectors.data
+
+    @property
+    def lists(self):
+        return [ids.data for ids in self._lists]
+
+    def __len__(self):
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def _assign(self, X, batch_size=8192):
+        labels = np.empty(len(X), dtype=np.int64)
+        for start in range(0, len(X), batch_size):
+            labels[start:start + batch_size] = np.argmax(
+                X[start:start + batch_size] @ self.centroids.T, axis=1
+            )
+        return labels
+
+    def _train_centroids(self, X, n_lists):
+        rng = np.random.default_rng(self.seed)
+        if len(X) > self.max_train_points:
+            X = X[rng.choice(len(X), self.max_train_points, replace=False)]
+        self.centroids = X[rng.choice(len(X), n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            labels = self._assign(X)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, X)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Keep the previous centroid for clusters that went empty
+            filled = counts > 0
+            self.centroids[filled] = normalize_rows(sums[filled])
+
+    def build(self, features):
+        vectors = normalize_rows(features)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        self._train_centroids(vectors, n_lists)
+
+        self._vectors = GrowableArray(vectors)
+        self._labels = GrowableArray(self._assign(vectors))
+        self._build_lists()
+        return self
+
+    def _build_lists(self):
+        labels = self._labels.data
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(len(self.centroids) + 1))
+        self._lists = [GrowableArray(order[bounds[i]:bounds[i + 1]].copy())
+                       for i in range(len(self.centroids))]
+
+    def add(self, features):
+        """Append vectors to their nearest existing lists (centroids are not retrained)"""
+        vectors = normalize_rows(features)
+        labels = self._assign(vectors)
+        first_id = len(self)
+        self._vectors.append(vectors)
+        self._labels.append(labels)
+        for offset, label in enumerate(labels):
+            self._lists[label].append(first_id + offset)
+
+    def compact(self, keep):
+        """Drop the vectors where the boolean mask keep is False"""
+        self._vectors.compact(keep)
+        self._labels.compact(keep)
+        self._build_lists()
+
+    def view(self):
+        """Index over the current vectors only, unaffected by later adds and compactions"""
+        view = copy.copy(self)
+        view._vectors = GrowableArray(self.vectors)
+        view._labels = GrowableArray(self._labels.data)
+        view._lists = [GrowableArray(ids) for ids in self.lists]
+        return view
+
+    def arrays(self):
+        """The index's GrowableArrays, by name"""
+        arrays = {'vectors': self._vectors, 'labels': self._labels}
+        arrays.update({f'list_{i}': ids for i, ids in enumerate(self._lists)})
+        return arrays
+
+    def similarities(self, queries, ids=None):
+        """Exact cosine similarity against every vector or those in ids (used for re-scoring)"""
+        queries = normalize_rows(np.atleast_2d(queries))
+        return subset_similarities(queries, self.vectors, ids)
+
+    def search(self, queries, k):
+        """Return (ids, similarities) of approximately the k most similar vectors"""
+        queries = normalize_rows(np.atleast_2d(queries))
+        k = min(k, len(self))
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = top_k_indices(queries @ self.centroids.T, n_probe)
+        lists = self.lists
+
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([lists[p] for p in probes[row]])
+            if len(candidates) < k:
+                # Probed buckets are too small, fall back to the full population
+                candidates = np.arange(len(self))
+            scores = self.vectors[candidates] @ query
+            best = top_k_indices(scores, k)
+            ids[row, :len(best)] = candidates[best]
+            sims[row, :len(best)] = scores[best]
+        return ids, sims
+
+
+INDEX_BACKENDS = {
+    'exact': ExactIndex,
+    'ivf': IVFIndex,
+}
+
+
+def build_index(features, backend='exact', **params):
+    """Build a retrieval index of the given backend over the features"""
+    try:
+        index_class = INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown index backend: {backend}")
+    return index_class(**params).build(features)
+
+
+def recall_at_k(index, reference, queries, k=10):
+    """Mean fraction of the reference top-k that the index also returns"""
+    found, _ = index.search(queries, k)
+    expected, _ = reference.search(queries, k)
+    hits = [len(np.intersect1d(f, e)) for f, e in zip(found, expected)]
+    return float(np.mean(hits)) / k
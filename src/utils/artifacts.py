@@ -0,0 +1,43 @@
+# src/utils/artifacts.py
+import hashlib
+import json
+import os
+import pickle
+
+METADATA_FILE = 'metadata.json'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_pickle(obj, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def write_metadata(directory, metadata):
+    """Write the metadata file last, so its presence marks a complete save"""
+    tmp_path = os.path.join(directory, METADATA_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, METADATA_FILE))
+
+
+def read_metadata(directory):
+    """Return the saved metadata, or None if there is no complete save"""
+    path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
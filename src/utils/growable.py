@@ -0,0 +1,62 @@
+# src/utils/growable.py
+import numpy as np
+
+
+class GrowableArray:
+    """Preallocated NumPy array with amortized O(1) appends along axis 0.
+
+    Wraps an existing array without copying it; storage is only copied
+    into a larger buffer (doubling capacity) when an append overflows.
+    """
+
+    def __init__(self, initial=None, dtype=np.float32, row_shape=(), capacity=0):
+        if initial is None:
+            initial = np.empty((0,) + tuple(row_shape), dtype=dtype)
+        self._buffer = initial
+        self._size = len(initial)
+        if capacity > self._size:
+            self._reserve(capacity)
+
+    @property
+    def data(self):
+        """View of the filled part of the buffer"""
+        return self._buffer[:self._size]
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    @property
+    def dtype(self):
+        return self._buffer.dtype
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, capacity):
+        buffer = np.empty((capacity,) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+        buffer[:self._size] = self._buffer[:self._size]
+        self._buffer = buffer
+
+    def append(self, values):
+        """Append rows, growing the buffer geometrically when full"""
+        values = np.asarray(values, dtype=self._buffer.dtype)
+        if values.ndim == self._buffer.ndim - 1:
+            values = values[None]
+        needed = self._size + len(values)
+        if needed > self.capacity:
+            self._reserve(max(needed, 2 * self.capacity, 16))
+        self._buffer[self._size:needed] = values
+        self._size = needed
+
+    def rebind(self, buffer):
+        """Use buffer, holding exactly the current rows, as storage (e.g. a
+        shared memory copy). A later append copies out of it again."""
+        self._buffer = buffer
+        self._size = len(buffer)
+
+    def compact(self, keep):
+        """Drop rows where the boolean mask keep is False"""
+        kept = self.data[keep]
+        self._buffer = np.array(kept, dtype=self._buffer.dtype)
+        self._size = len(kept)
@@ -0,0 +1,159 @@
+# src/utils/instrumentation.py
+import bisect
+import os
+import random
+import threading
+import time
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """Shared no-op timer returned while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    def __init__(self, instrumentation, name, labels):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentation.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+class Instrumentation:
+    """Counters, gauges and latency histograms with Prometheus text export.
+
+    When disabled, stage() returns a shared no-op context manager and the
+    record methods return immediately, so instrumented code costs almost
+    nothing. Debug logging on hot paths is sampled with should_log().
+    """
+
+    def __init__(self, enabled=True, log_sample_rate=0.01, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.log_sample_rate = log_sample_rate
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        """Set the HELP text exported for a metric"""
+        self._help[name] = help_text
+
+    def _series(self, name, kind):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {'kind': kind, 'series': {}}
+        return metric['series']
+
+    def stage(self, stage, name='matching_stage_seconds', **labels):
+        """Context manager timing a pipeline stage into a histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        labels['stage'] = stage
+        return _StageTimer(self, name, labels)
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, 'histogram')
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, 'counter')
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled or value is None:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series(name, 'gauge')[key] = value
+
+    def should_log(self):
+        """Sample hot-path log lines at log_sample_rate"""
+        return self.log_sample_rate >= 1 or random.random() < self.log_sample_rate
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key, value in sorted(metric['series'].items()):
+                    if metric['kind'] != 'histogram':
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide instance; set MATCHING_INSTRUMENTATION=0 to disable it
+instrumentation = Instrumentation(enabled=os.environ.get('MATCHING_INSTRUMENTATION', '1') != '0')
+instrumentation.describe('matching_stage_seconds', "Time spent in each matching pipeline stage")
+instrumentation.describe('matching_requests_total', "Matching queries served")
+instrumentation.describe('matching_errors_total', "Matching queries that raised an error")
+instrumentation.describe('matching_batch_queries_total', "Queries scored by batch matching")
+instrumentation.describe('http_requests_total', "HTTP requests by endpoint and status")
+instrumentation.describe('http_request_seconds', "HTTP request latency by endpoint")
+instrumentation.describe('match_batches_total', "Micro-batches scored by the /match batcher")
+instrumentation.describe('match_batched_requests_total', "Requests scored through the /match batcher")
+instrumentation.describe('match_batch_wait_seconds', "Time a request waited for its micro-batch to start")
@@ -2,6 +2,80 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from src.utils.artifacts import save_pickle, load_pickle
+
+
+BINARY_TRUE_VALUES = ('Available', 'Selected')
+
+
+class FeaturePlan:
+   """Compiled feature layout for encoding single students without pandas.
+
+   Built from a fitted DataPreprocessor, it holds the fixed output column
+   order, category-to-position lookup tables and the age scaler constants,
+   and writes a plain dict straight into a float32 row.
+   """
+
+   def __init__(self, columns, age_mean, age_scale, categorical_positions, binary_positions):
+       self.columns = list(columns)
+       self.age_mean = float(age_mean)
+       self.age_scale = float(age_scale)
+       # [(column, {category: position})]
+       self.categorical_positions = categorical_positions
+       # [(column, position)]
+       self.binary_positions = binary_positions
+
+   @classmethod
+   def compile(cls, preprocessor, availability_cols, interest_cols):
+       columns = (['Child_Age'] + list(preprocessor.encoded_feature_names)
+                  + list(availability_cols) + list(interest_cols))
+
+       categorical_positions = []
+       position = 1
+       for column, categories in zip(preprocessor.categorical_columns,
+                                     preprocessor.encoder.categories_):
+           lookup = {category: position + i for i, category in enumerate(categories)}
+           categorical_positions.append((column, lookup))
+           position += len(categories)
+
+       binary_cols = list(availability_cols) + list(interest_cols)
+       binary_positions = [(column, position + i) for i, column in enumerate(binary_cols)]
+
+       return cls(
+           columns,
+           age_mean=preprocessor.scaler.mean_[0],
+           age_scale=preprocessor.scaler.scale_[0],
+           categorical_positions=categorical_positions,
+           binary_positions=binary_positions
+       )
+
+   def __len__(self):
+       return len(self.columns)
+
+   def encode(self, record, out=None):
+       """Encode a student dict into a float32 feature row"""
+       if out is None:
+           out = np.zeros(len(self.columns), dtype=np.float32)
+       else:
+           out[:] = 0.0
+
+       out[0] = (record['Child_Age'] - self.age_mean) / self.age_scale
+       for column, lookup in self.categorical_positions:
+           # Unknown categories encode as all zeros, like handle_unknown='ignore'
+           position = lookup.get(record[column])
+           if position is not None:
+               out[position] = 1.0
+       for column, position in self.binary_positions:
+           if record[column] in BINARY_TRUE_VALUES:
+               out[position] = 1.0
+       return out
+
+   def encode_many(self, records):
+       """Encode a list of student dicts into a float32 matrix"""
+       X = np.zeros((len(records), len(self.columns)), dtype=np.float32)
+       for row, record in zip(X, records):
+           self.encode(record, out=row)
+       return X
 
 
 class DataPreprocessor:
@@ -16,13 +90,51 @@ class DataPreprocessor:
            'Preference_Same_Gender'
        ]
        self.encoded_feature_names = None
+       self.feature_plan = None
        
    def fit(self, df):
        """Fit the preprocessor to the training data"""
        categorical_data = df[self.categorical_columns]
        self.encoder.fit(categorical_data)
-       self.encoded_feature_names = self.encoder.get_feature_names_out(self.categorical_columns)
        self.scaler.fit(df[['Child_Age']])
+       self._compile(df.columns)
+
+   def partial_fit(self, df):
+       """Update the fit with one chunk of the training data.
+
+       Categories seen so far are merged with the chunk's and the age scaler
+       keeps a running mean and variance, so calling this on every chunk of
+       a roster gives the same preprocessor as fit() on all of it.
+       """
+       known = getattr(self.encoder, 'categories_', None)
+       categories = []
+       for i, column in enumerate(self.categorical_columns):
+           values = set(df[column].unique())
+           if known is not None:
+               values.update(known[i])
+           # Sorted like the categories OneHotEncoder finds by itself
+           categories.append(np.array(sorted(values), dtype=object))
+
+       # OneHotEncoder has no partial_fit; refit it on the merged categories
+       self.encoder = OneHotEncoder(categories=categories, sparse_output=False, handle_unknown='ignore')
+       longest = max(len(values) for values in categories)
+       self.encoder.fit(pd.DataFrame({
+           column: np.resize(values, longest)
+           for column, values in zip(self.categorical_columns, categories)
+       }))
+       self.scaler.partial_fit(df[['Child_Age']])
+       self._compile(df.columns)
+       return self
+
+   def _compile(self, columns):
+       self.encoded_feature_names = self.encoder.get_feature_names_out(self.categorical_columns)
+
+       # Compile the single-row fast path with the training column order
+       self.feature_plan = FeaturePlan.compile(
+           self,
+           availability_cols=[col for col in columns if col.startswith('Available_Time_')],
+           interest_cols=[col for col in columns if col.startswith('Interest_')]
+       )
    
    def preprocess_data(self, df):
        """Preprocess the student data for the matching system"""
@@ -33,7 +145,7 @@ class DataPreprocessor:
        interest_cols = [col for col in df.columns if col.startswith('Interest_')]
        
        for col in availability_cols + interest_cols:
-           df_processed[col] = (df_processed[col].isin(['Available', 'Selected'])).astype(int)
+           df_processed[col] = (df_processed[col].isin(BINARY_TRUE_VALUES)).astype(int)
        
        # One-hot encode categorical variables using fitted encoder
        categorical_data = df_processed[self.categorical_columns]
@@ -71,5 +183,21 @@ class DataPreprocessor:
        
        return final_df
 
+   def transform_record(self, record):
+       """Encode a single student dict with the compiled feature plan"""
+       return self.feature_plan.encode(record)
+
    def get_feature_names(self):
-       return self.encoded_feature_names.tolist() if self.encoded_feature_names is not None else None
\ No newline at end of file
+       return self.encoded_feature_names.tolist() if self.encoded_feature_names is not None else None
+
+   def save(self, path):
+       """Save the fitted encoder/scaler state"""
+       save_pickle(self, path)
+
+   @classmethod
+   def load(cls, path):
+       """Load a preprocessor saved with save()"""
+       preprocessor = load_pickle(path)
+       if not isinstance(preprocessor, cls):
+           raise TypeError(f"{path} does not contain a {cls.__name__}")
+       return preprocessor
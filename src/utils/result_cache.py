@@ -0,0 +1,122 @@
+# src/utils/result_cache.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def approximate_size(obj):
+    """Rough deep size in bytes of nested dicts, lists, scalars and plain objects"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key) + approximate_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(approximate_size(item) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += approximate_size(vars(obj))
+    return size
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a time-to-live for match results.
+
+    Entries belong to a generation (for matching, the model version and the
+    population version). Looking up or storing under a new generation drops
+    every entry of the old one, so results never outlive the model or the
+    population they were computed from.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = None
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_generation(self, generation):
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._nbytes = 0
+            self._generation = generation
+
+    def _drop(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._nbytes -= nbytes
+
+    def get(self, key, generation):
+        """Cached value for key, or None on a miss"""
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, _ = entry
+            if expires < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, generation, value):
+        # A result computed against an older generation is not stored
+        if generation != self._generation:
+            return
+        nbytes = approximate_size(value)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, nbytes)
+            self._nbytes += nbytes
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, generation, compute):
+        """Return the cached value for key, computing and storing it on a miss.
+
+        A key of None bypasses the cache.
+        """
+        if key is None:
+            return compute()
+        value = self.get(key, generation)
+        if value is None:
+            value = compute()
+            self.put(key, generation, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'nbytes': self._nbytes,
+        }
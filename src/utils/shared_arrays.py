@@ -0,0 +1,65 @@
+# src/utils/shared_arrays.py
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArrays:
+    """Named NumPy arrays backed by POSIX shared memory.
+
+    The creating process copies arrays in with put(). Forked children see
+    the same pages directly; unrelated processes can attach() by the names
+    in spec(). Only the creator should unlink() the blocks.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._arrays = {}
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def put(self, name, array):
+        """Copy array into a new shared block and return the shared view"""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        self._blocks[name] = block
+        self._arrays[name] = shared
+        return shared
+
+    def get(self, name):
+        return self._arrays[name]
+
+    def spec(self):
+        """Picklable description of the blocks, for attach()"""
+        return {
+            name: (self._blocks[name].name, array.shape, array.dtype.str)
+            for name, array in self._arrays.items()
+        }
+
+    @classmethod
+    def attach(cls, spec):
+        """Map the blocks described by another process's spec() without copying"""
+        shared = cls()
+        for name, (block_name, shape, dtype) in spec.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            shared._blocks[name] = block
+            shared._arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        return shared
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def close(self):
+        """Unmap the blocks; arrays returned earlier must no longer be in use"""
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+
+    def unlink(self):
+        """Free the blocks once every process has finished with them"""
+        for block in self._blocks.values():
+            block.unlink()
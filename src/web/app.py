@@ -1,50 +1,249 @@
 # src/web/app.py
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+import base64
+import functools
+import json
+import logging
 import pandas as pd
 import os
 import sys
+import time
 
 # Add the project root directory to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.models.matching_system import StudentMatchingSystem
+from src.models.matching_system import EXPLANATION_FIELDS, MATCH_FIELDS, StudentMatchingSystem
+from src.models.retraining import ModelHandle, RetrainingScheduler
+from src.web.batcher import MicroBatcher
 from src.data.data_generator import generate_sample_data
+from src.utils.artifacts import file_sha256
+from src.utils.instrumentation import instrumentation
+from src.utils.result_cache import ResultCache
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+data_file = os.environ.get('MATCHING_DATA', os.path.join(project_root, "data", "student_data.csv"))
+artifact_dir = os.environ.get('MATCHING_ARTIFACTS', os.path.join(project_root, "artifacts"))
+
 def ensure_data_exists():
     """Ensure sample data exists and return the DataFrame"""
-    data_dir = os.path.join(project_root, "data")
-    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
     
-    data_file = os.path.join(data_dir, "student_data.csv")
     if not os.path.exists(data_file):
-        print("Generating new sample data...")
+        logger.info("Generating new sample data...")
         df = generate_sample_data(n_samples=300, save_path=data_file)
-        print(f"Sample data saved to {data_file}")
+        logger.info("Sample data saved to %s", data_file)
     else:
-        print("Loading existing sample data...")
+        logger.info("Loading existing sample data...")
         df = pd.read_csv(data_file)
     return df
 
 # Initialize data and matching system
-df = ensure_data_exists()
-matching_system = StudentMatchingSystem()
-matching_system.fit(df)
+model_handle = ModelHandle(
+    StudentMatchingSystem.load_or_fit(artifact_dir, ensure_data_exists(), file_sha256(data_file))
+)
+retraining_scheduler = RetrainingScheduler(model_handle, os.path.join(artifact_dir, "retrain"))
+match_cache = ResultCache(
+    max_entries=int(os.environ.get('MATCH_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('MATCH_CACHE_TTL', 600))
+)
+
+# /match pages through the best MATCH_RANKING_DEPTH matches of each student,
+# whose ranking (about 32 bytes per match) is kept in match_cache
+RANKING_DEPTH = int(os.environ.get('MATCH_RANKING_DEPTH', 500))
+MAX_PAGE_SIZE = 100
+
+# Setting MATCH_BATCH_WAIT_MS scores concurrent /match requests in micro-batches
+match_batcher = None
+if os.environ.get('MATCH_BATCH_WAIT_MS') is not None:
+    match_batcher = MicroBatcher(
+        max_batch_size=int(os.environ.get('MATCH_BATCH_SIZE', 32)),
+        max_wait_ms=float(os.environ['MATCH_BATCH_WAIT_MS'])
+    )
+
+def population_writer(view):
+    """Refuse population changes when workers share a read-only population"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if app.config.get('READ_ONLY'):
+            return jsonify({'error': 'Population changes are disabled in multi-worker mode'}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.before_request
+def start_timer():
+    request.start_time = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unknown'
+    instrumentation.inc('http_requests_total', endpoint=endpoint, status=response.status_code)
+    instrumentation.observe('http_request_seconds', time.perf_counter() - request.start_time,
+                            endpoint=endpoint)
+    return response
 
 @app.route('/')
 def index():
     age_range = range(3, 14)  # Ages from 3 to 13
     return render_template('index.html', age_range=age_range)
 
+def request_constraints():
+    """Hard constraints from the query string, e.g. ?max_age_gap=2&same_region=1"""
+    constraints = {}
+    for name in ('max_age_gap', 'min_overlap_slots'):
+        value = request.args.get(name, type=int)
+        if value is not None:
+            constraints[name] = value
+    for name in ('same_region', 'same_gender'):
+        if request.args.get(name, '').lower() in ('1', 'true', 'yes'):
+            constraints[name] = True
+    return constraints
+
+def response_fields():
+    """Match fields requested with ?fields=student_id,similarity_score and ?explain=false"""
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else list(MATCH_FIELDS)
+    unknown = [field for field in fields if field not in MATCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if request.args.get('explain', '').lower() in ('0', 'false', 'no'):
+        fields = [field for field in fields if field not in EXPLANATION_FIELDS]
+    if not fields:
+        raise ValueError("No fields left to return; explain=false drops the explanation fields")
+    return tuple(fields)
+
+def encode_cursor(offset, version, population_version):
+    return base64.urlsafe_b64encode(f"{offset}:{version}:{population_version}".encode()).decode()
+
+def decode_cursor(cursor):
+    """(offset, model version, population version) of a cursor from a previous page"""
+    try:
+        offset, version, population_version = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return int(offset), int(version), int(population_version)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
 @app.route('/match', methods=['POST'])
 def match():
+    """Top matches of a student, one page at a time.
+
+    ?limit= sets the page size (default 5) and ?cursor= continues from the
+    next_cursor of the previous page; the ranking computed for the first
+    page is cached and reused for the next ones.
+    """
     student_data = request.json
     student_data['Child_Age'] = int(student_data['Child_Age'])
-    matches = matching_system.find_matches(student_data, top_n=5)
-    return jsonify(matches)
+    try:
+        fields = response_fields()
+        limit = request.args.get('limit', 5, type=int)
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        cursor = request.args.get('cursor')
+        offset, cursor_version, cursor_population = decode_cursor(cursor) if cursor else (0, None, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    version, matching_system = model_handle.current()
+    if cursor and (cursor_version, cursor_population) != (version, matching_system.population_version):
+        return jsonify({'error': 'The ranking changed since this cursor was issued; start again without it'}), 410
+    
+    constraints = request_constraints()
+    # With batching on, unconstrained cache misses are ranked in micro-batches
+    ranker = functools.partial(match_batcher.rank, matching_system) if match_batcher else None
+    ranking = matching_system.rank_matches_cached(student_data, match_cache, model_version=version,
+                                                  constraints=constraints, max_depth=RANKING_DEPTH,
+                                                  ranker=ranker)
+    matches = matching_system.matches_page(student_data, ranking, offset, limit, fields)
+    has_more = offset + limit < len(ranking)
+    
+    # The cursor names the population the ranking was scored in
+    next_cursor = encode_cursor(offset + limit, version, ranking.population.version) if has_more else None
+    return jsonify({'model_version': version, 'matches': matches, 'next_cursor': next_cursor})
+
+@app.route('/match/batch', methods=['POST'])
+def match_batch():
+    """Match many students at once, streaming one JSON line per student"""
+    payload = request.json
+    students = payload['students'] if isinstance(payload, dict) else payload
+    top_n = int(payload.get('top_n', 5)) if isinstance(payload, dict) else 5
+    
+    students_df = pd.DataFrame(students)
+    students_df['Child_Age'] = students_df['Child_Age'].astype(int)
+    
+    version, matching_system = model_handle.current()
+    
+    def generate():
+        results = matching_system.iter_matches_batch(students_df, top_n=top_n)
+        for i, matches in enumerate(results):
+            yield json.dumps({'query': i, 'model_version': version, 'matches': matches}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/students', methods=['POST'])
+@population_writer
+def add_students():
+    """Register one student or a list of students without retraining"""
+    payload = request.json
+    students = payload if isinstance(payload, list) else [payload]
+    for student in students:
+        student['Child_Age'] = int(student['Child_Age'])
+    
+    with model_handle.lock:
+        version, matching_system = model_handle.current()
+        student_ids = matching_system.add_students(students)
+    return jsonify({
+        'model_version': version,
+        'student_ids': student_ids.tolist(),
+        'drift': matching_system.drift_monitor.report()
+    }), 201
+
+@app.route('/students/<int:student_id>', methods=['DELETE'])
+@population_writer
+def remove_student(student_id):
+    with model_handle.lock:
+        removed = model_handle.system.remove_students([student_id])
+    if not removed:
+        return jsonify({'error': f'Unknown student id: {student_id}'}), 404
+    return '', 204
+
+@app.route('/admin/retrain', methods=['POST'])
+@population_writer
+def retrain():
+    """Retrain in the background; the new model is swapped in when ready"""
+    retraining_scheduler.request_retrain()
+    return jsonify(retraining_scheduler.status()), 202
+
+@app.route('/admin/status')
+def status():
+    return jsonify(dict(
+        retraining_scheduler.status(),
+        match_cache=match_cache.stats(),
+        match_batching=match_batcher.stats() if match_batcher else None
+    ))
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    status = retraining_scheduler.status()
+    instrumentation.set_gauge('model_version', status['model_version'])
+    instrumentation.set_gauge('retrain_queue_depth', status['queue_depth'])
+    instrumentation.set_gauge('retrain_last_training_seconds', status['last_training_seconds'])
+    instrumentation.set_gauge('retrain_last_swap_seconds', status['last_swap_seconds'])
+    instrumentation.set_gauge('retrains_completed', status['retrains_completed'])
+    instrumentation.set_gauge('retrains_failed', status['retrains_failed'])
+    instrumentation.set_gauge('population_size', len(model_handle.system.alive_student_ids()))
+    cache_stats = match_cache.stats()
+    instrumentation.set_gauge('match_cache_entries', cache_stats['entries'])
+    instrumentation.set_gauge('match_cache_bytes', cache_stats['nbytes'])
+    instrumentation.set_gauge('match_cache_hits', cache_stats['hits'])
+    instrumentation.set_gauge('match_cache_misses', cache_stats['misses'])
+    instrumentation.set_gauge('match_cache_hit_rate', cache_stats['hit_rate'])
+    return Response(instrumentation.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True) 
\ No newline at end of file
@@ -0,0 +1,154 @@
+# src/web/batcher.py
+import asyncio
+import os
+import threading
+import time
+
+from src.utils.instrumentation import instrumentation as default_instrumentation
+
+
+class MicroBatcher:
+    """Collects concurrent match requests into micro-batches.
+
+    An asyncio event loop in a background thread gathers requests until
+    max_batch_size are waiting or the first has waited max_wait_ms, then
+    scores them together with the system's batch ranker: one encoder call,
+    one matrix-matrix product against the population and batched penalties.
+    Requests that arrive while a batch is being scored form the next one.
+    Threads (e.g. Flask request handlers) call rank() or match() and block
+    until their own results are ready.
+    """
+
+    def __init__(self, max_batch_size=32, max_wait_ms=2.0, instrumentation=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.instrumentation = instrumentation or default_instrumentation
+        self._start_lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self._total_wait = 0.0
+
+    def _ensure_started(self):
+        # The loop thread does not survive a fork, so workers start their own
+        if self._loop is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._queue = asyncio.Queue()
+                collector = loop.create_task(self._collect())
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                # Stopped by close(): let the collector unwind before closing the loop
+                collector.cancel()
+                loop.run_until_complete(asyncio.gather(collector, return_exceptions=True))
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name='match-batcher', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            self._pid = os.getpid()
+
+    async def submit(self, system, student_data, max_depth=1000):
+        """Queue one request and wait for its ranking (runs on the batcher's loop)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((system, student_data, max_depth, time.perf_counter(), future))
+        return await future
+
+    def rank(self, system, student_data, max_depth=1000, timeout=None):
+        """Blocking equivalent of system.rank_matches(student_data, max_depth=max_depth)"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self.submit(system, student_data, max_depth), self._loop
+        ).result(timeout)
+
+    def match(self, system, student_data, top_n=5, timeout=None):
+        """Blocking equivalent of system.find_matches(student_data, top_n)"""
+        ranking = self.rank(system, student_data, max_depth=top_n, timeout=timeout)
+        return system.matches_page(student_data, ranking, 0, top_n)
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                try:
+                    if remaining <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+
+            self._record(batch)
+            results = await loop.run_in_executor(None, self._score, batch)
+            for (*_, future), result in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _record(self, batch):
+        now = time.perf_counter()
+        metrics = self.instrumentation
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        metrics.inc('match_batches_total')
+        metrics.inc('match_batched_requests_total', len(batch))
+        for *_, enqueued, _ in batch:
+            self._total_wait += now - enqueued
+            metrics.observe('match_batch_wait_seconds', now - enqueued)
+
+    def _score(self, batch):
+        """Rank a batch, one batch ranker call per system and depth; errors are returned per request"""
+        results = [None] * len(batch)
+        groups = {}
+        for position, (system, _, max_depth, *_) in enumerate(batch):
+            groups.setdefault((id(system), max_depth), []).append(position)
+
+        for (_, max_depth), positions in groups.items():
+            system = batch[positions[0]][0]
+            try:
+                rankings = system.rank_matches_batch(
+                    [batch[position][1] for position in positions],
+                    max_depth=max_depth, query_block=self.max_batch_size
+                )
+                for position, ranking in zip(positions, rankings):
+                    results[position] = ranking
+            except Exception as e:
+                for position in positions:
+                    results[position] = e
+        return results
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': self.requests / self.batches if self.batches else None,
+            'largest_batch': self.largest_batch,
+            'mean_wait_ms': self._total_wait / self.requests * 1000 if self.requests else None,
+        }
+
+    def close(self):
+        if self._loop is not None and self._pid == os.getpid():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop = None
@@ -0,0 +1,114 @@
+# src/web/serve.py
+"""Pre-fork multi-worker server for the matching app.
+
+The parent process loads the model once, moves the population arrays into
+shared memory and forks the workers, which all accept on one listening
+socket. Workers read the shared arrays without copying them, so memory stays
+roughly flat as workers are added:
+
+    python src/web/serve.py --workers 4 --port 8000
+
+Adding or removing students and retraining are disabled in this mode, since
+each worker would otherwise drift apart; use app.py for those.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+
+from werkzeug.serving import make_server
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.utils.shared_arrays import SharedArrays
+
+logger = logging.getLogger(__name__)
+
+
+def _run_worker(app, sock, threaded):
+    """Serve requests from the inherited socket until terminated"""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = make_server(*sock.getsockname()[:2], app, threaded=threaded, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def _fork_worker(app, sock, threaded):
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(app, sock, threaded)
+    return pid
+
+
+def serve(app, system, host='127.0.0.1', port=8000, workers=None, threaded=False, backlog=1024):
+    """Share system's arrays, then fork workers serving app and restart any that die"""
+    workers = workers or os.cpu_count()
+    shared = system.share_memory(SharedArrays())
+    app.config['READ_ONLY'] = True
+    logger.info("Shared %.1f MB of population arrays", shared.nbytes / 1e6)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    children = set()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # Keep the collector from touching (and so copying) the parent's objects
+    gc.freeze()
+    for _ in range(workers):
+        children.add(_fork_worker(app, sock, threaded))
+    logger.info("Serving on http://%s:%d with %d workers", host, port, workers)
+
+    try:
+        while children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                logger.warning("Worker %d exited, starting a replacement", pid)
+                children.add(_fork_worker(app, sock, threaded))
+    finally:
+        sock.close()
+        shared.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument('--threaded', action='store_true', help="handle requests in threads within each worker")
+    args = parser.parse_args()
+
+    # Importing the app loads (or trains) the model in the parent
+    from src.web.app import app, model_handle
+    serve(app, model_handle.system, host=args.host, port=args.port,
+          workers=args.workers, threaded=args.threaded)
+
+
+if __name__ == "__main__":
+    main()
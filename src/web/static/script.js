@@ -60,8 +60,8 @@ document.getElementById('matchingForm').addEventListener('submit', async (e) =>
             body: JSON.stringify(formData)
         });
         
-        const matches = await response.json();
-        displayMatches(matches);
+        const result = await response.json();
+        displayMatches(result.matches);
     } catch (error) {
         console.error('Error:', error);
         alert('An error occurred while finding matches. Please try again.');
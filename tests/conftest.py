@@ -0,0 +1,20 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Add the project root directory to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.data.data_generator import generate_sample_data
+
+
+@pytest.fixture(scope='session')
+def roster():
+    """Seeded roster whose nicknames spell out each student's position, s0, s1, ..."""
+    df = generate_sample_data(n_samples=600, seed=0)
+    df['Child_Nickname'] = [f's{i}' for i in range(len(df))]
+    return df
@@ -0,0 +1,87 @@
+# tests/test_batching.py
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.matching_system import StudentMatchingSystem
+from src.utils.result_cache import ResultCache
+from src.web.batcher import MicroBatcher
+
+
+@pytest.fixture(scope='module')
+def system(roster):
+    system = StudentMatchingSystem(encoding_dim=8)
+    system.fit(roster.iloc[:400], epochs=1, batch_size=32)
+    return system
+
+
+@pytest.fixture
+def batcher():
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=5.0)
+    yield batcher
+    batcher.close()
+
+
+def queries(roster):
+    records = roster.iloc[400:420].to_dict('records')
+    for record in records:
+        record['Child_Age'] = int(record['Child_Age'])
+    return records
+
+
+def page_ids(system, student, ranking, offset, limit):
+    return [match['student_id'] for match in system.matches_page(student, ranking, offset, limit, ['student_id'])]
+
+
+def test_rank_matches_batch_matches_rank_matches(system, roster):
+    students = queries(roster)
+    rankings = system.rank_matches_batch(students, max_depth=50, query_block=8, population_block=128)
+    for student, ranking in zip(students, rankings):
+        # Matrix-matrix and matrix-vector products round differently, so near
+        # ties may swap places; every candidate must keep its own score
+        expected = system.rank_matches(student, max_depth=len(system.population))
+        expected_scores = dict(zip(expected.ids.tolist(), expected.scores))
+        ids, scores, _, _ = ranking.page(0, 50)
+        assert ranking.population is system.population
+        assert len(ranking) == 50
+        np.testing.assert_allclose(scores, [expected_scores[idx] for idx in ids.tolist()], atol=1e-6)
+        np.testing.assert_allclose(scores, expected.page(0, 50)[1], atol=1e-6)
+
+
+def test_rank_matches_batch_uses_the_candidate_pool(roster):
+    system = StudentMatchingSystem(encoding_dim=8, index_backend='ivf', candidate_pool=30)
+    system.fit(roster.iloc[:400], epochs=1, batch_size=32)
+    system.remove_students([1, 2, 3])
+    students = queries(roster)
+    rankings = system.rank_matches_batch(students, max_depth=20, query_block=8)
+    shortlists, _ = system.population.index.search(system.encode_students(pd.DataFrame(students)), 30)
+    for student, ranking, shortlist in zip(students, rankings, shortlists):
+        expected = system.rank_matches(student, max_depth=20)
+        assert len(ranking) == len(expected)
+        assert set(ranking.ids.tolist()) <= set(shortlist.tolist()) - {1, 2, 3}
+        np.testing.assert_allclose(ranking.page(0, 20)[1], expected.page(0, 20)[1], atol=1e-6)
+
+
+def test_batched_first_page_is_cached_for_later_pages(system, roster, batcher):
+    cache = ResultCache()
+    ranker = functools.partial(batcher.rank, system)
+    student = queries(roster)[0]
+
+    first = system.rank_matches_cached(student, cache, max_depth=50, ranker=ranker)
+    second = system.rank_matches_cached(student, cache, max_depth=50, ranker=ranker)
+    assert second is first
+    assert batcher.requests == 1
+
+    pages = page_ids(system, student, first, 0, 10) + page_ids(system, student, second, 10, 10)
+    assert pages == first.ids[:20].tolist()
+    assert len(set(pages)) == 20
+
+
+def test_match_equals_find_matches(system, roster, batcher):
+    for student in queries(roster)[:5]:
+        matches = batcher.match(system, student, top_n=5)
+        expected = system.find_matches(student, top_n=5)
+        np.testing.assert_allclose([m['similarity_score'] for m in matches],
+                                   [m['similarity_score'] for m in expected], atol=1e-6)
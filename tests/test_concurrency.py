@@ -0,0 +1,103 @@
+# tests/test_concurrency.py
+import threading
+
+import numpy as np
+import pytest
+
+from src.models.matching_system import StudentMatchingSystem
+from src.models.retraining import ModelHandle
+
+N_TRAIN = 400
+
+
+@pytest.fixture(params=['exact', 'ivf'])
+def system(request, roster):
+    # A low threshold so that removals trigger frequent compactions
+    system = StudentMatchingSystem(encoding_dim=8, index_backend=request.param,
+                                   candidate_pool=50 if request.param == 'ivf' else None,
+                                   compaction_threshold=0.02)
+    system.fit(roster.iloc[:N_TRAIN], epochs=1, batch_size=32)
+    return system
+
+
+def query(roster, i):
+    student = roster.iloc[i].to_dict()
+    student['Child_Age'] = int(student['Child_Age'])
+    return student
+
+
+def check_matches(matches):
+    for match in matches:
+        # The id and the stored record must come from the same population
+        assert match['student']['Child_Nickname'] == f"s{match['student_id']}"
+
+
+def test_matching_while_population_changes(system, roster):
+    handle = ModelHandle(system)
+    queries = [query(roster, i) for i in range(0, len(roster), 60)]
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        rng = np.random.default_rng(0)
+        try:
+            for start in range(N_TRAIN, len(roster), 5):
+                added = roster.iloc[start:start + 5]
+                with handle.lock:
+                    system.add_students(added, student_ids=np.arange(start, start + len(added)))
+                    alive = system.alive_student_ids()
+                    system.remove_students(rng.choice(alive, 8, replace=False))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader(i):
+        try:
+            while not done.is_set():
+                student = queries[i % len(queries)]
+                check_matches(system.find_matches(student, top_n=10))
+                check_matches(system.find_matches(student, top_n=10, constraints={'max_age_gap': 2}))
+                for matches in system.find_matches_batch(queries[:4], top_n=5):
+                    check_matches(matches)
+                ranking = system.rank_matches(student, max_depth=50)
+                check_matches(system.matches_page(student, ranking, offset=10, limit=10))
+                i += 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors[:3]
+    assert system.population_version > 1
+    assert len(system.population) == len(system.population.student_ids) == len(system.population.index.vectors)
+
+
+def test_population_is_unchanged_by_later_writes(system, roster):
+    population = system.population
+    ids = population.student_ids.copy()
+    system.add_students(roster.iloc[N_TRAIN:N_TRAIN + 50])
+    system.remove_students(ids[:100])
+
+    assert system.population is not population
+    assert len(population) == N_TRAIN and population.n_removed == 0
+    np.testing.assert_array_equal(population.student_ids, ids)
+    assert population.alive.all()
+    assert len(system.population) == N_TRAIN + 50 - 100
+    assert population.students.record(0)['Child_Nickname'] == 's0'
+
+
+def test_population_snapshot_does_not_compact(system):
+    system.compaction_threshold = 0.5
+    system.remove_students([3, 5, 7])
+    population = system.population
+    df, ids = system.population_snapshot()
+
+    assert system.population is population and population.n_removed == 3
+    assert len(df) == len(ids) == N_TRAIN - 3
+    assert not np.isin([3, 5, 7], ids).any()
+    assert (df['Child_Nickname'] == [f's{i}' for i in ids]).all()
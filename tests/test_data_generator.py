@@ -0,0 +1,28 @@
+# tests/test_data_generator.py
+import pandas as pd
+import pytest
+
+from src.data import data_generator
+from src.data.data_generator import generate_sample_data, iter_sample_data, write_sample_data
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Small seed blocks so that chunks straddle several of them
+    monkeypatch.setattr(data_generator, 'SEED_BLOCK_SIZE', 64)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 50, 64, 100, 1000])
+def test_chunks_do_not_change_the_roster(chunk_size):
+    expected = generate_sample_data(300, seed=5)
+    chunks = list(iter_sample_data(300, chunk_size=chunk_size, seed=5))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+def test_written_roster_matches_generated(tmp_path):
+    path = str(tmp_path / 'roster.csv')
+    write_sample_data(path, 300, chunk_size=37, seed=5)
+    expected = generate_sample_data(300, seed=5, save_path=str(tmp_path / 'expected.csv'))
+    pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_csv(tmp_path / 'expected.csv'))
+    assert len(expected) == 300
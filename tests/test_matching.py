@@ -0,0 +1,52 @@
+# tests/test_matching.py
+import pytest
+
+from src.models.matching_system import MATCH_FIELDS, StudentMatchingSystem
+from src.utils.instrumentation import Instrumentation
+
+
+@pytest.fixture(scope='module')
+def system(roster):
+    system = StudentMatchingSystem(encoding_dim=8)
+    system.fit(roster.iloc[:300], epochs=1, batch_size=32)
+    return system
+
+
+@pytest.fixture
+def student(roster):
+    student = roster.iloc[300].to_dict()
+    student['Child_Age'] = int(student['Child_Age'])
+    return student
+
+
+def test_fields_select_match_fields(system, student):
+    assert [tuple(match) for match in system.find_matches(student, top_n=3)] == [MATCH_FIELDS] * 3
+    assert [tuple(match) for match in system.find_matches(student, top_n=3, fields=('penalty',))] == \
+        [('penalty',)] * 3
+    # No fields is not the same as every field
+    assert system.find_matches(student, top_n=3, fields=()) == [{}] * 3
+    ranking = system.rank_matches(student, max_depth=10)
+    assert system.matches_page(student, ranking, 0, 3, fields=()) == [{}] * 3
+
+
+def stage_counts(metrics):
+    series = metrics._series('matching_stage_seconds', 'histogram')
+    return {dict(key)['stage']: histogram.count for key, histogram in series.items()}
+
+
+@pytest.mark.parametrize('constraints', [None, {'max_age_gap': 2}])
+def test_each_stage_is_recorded_once_per_request(system, student, constraints):
+    default, system.instrumentation = system.instrumentation, Instrumentation()
+    metrics = system.instrumentation
+    try:
+        for _ in range(3):
+            system.find_matches(student, top_n=3, constraints=constraints)
+        ranking = system.rank_matches(student, max_depth=10, constraints=constraints)
+        system.matches_page(student, ranking, 0, 3)
+    finally:
+        system.instrumentation = default
+
+    counts = stage_counts(metrics)
+    assert set(counts.values()) == {4}
+    assert {'encode', 'penalties', 'adjust', 'top_k', 'explanation'} <= set(counts)
+    assert ('filter' in counts) == bool(constraints)
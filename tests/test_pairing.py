@@ -0,0 +1,56 @@
+# tests/test_pairing.py
+import numpy as np
+import pytest
+
+from src.models.matching_system import StudentMatchingSystem
+from src.models.pairing import mutual_scores, pair_cohort
+
+
+@pytest.fixture(scope='module')
+def system(roster):
+    system = StudentMatchingSystem(encoding_dim=8)
+    system.fit(roster.iloc[:200], epochs=1, batch_size=32)
+    return system
+
+
+def check_groups(system, result, cohort, group_size):
+    groups = result['groups']
+    members = [student for group in groups for student in group]
+    # Every student in exactly one group
+    assert sorted(members) == sorted(cohort)
+    assert result['n_students'] == len(cohort)
+    if len(cohort) >= group_size:
+        assert all(group_size <= len(group) < 2 * group_size for group in groups)
+        assert len(groups) == len(cohort) // group_size
+
+    population = system.population
+    positions = np.searchsorted(population.student_ids, np.arange(max(cohort) + 1))
+    group_scores = []
+    for group in groups:
+        a, b = np.triu_indices(len(group), 1)
+        group_positions = positions[group]
+        group_scores.append(mutual_scores(population, group_positions[a], group_positions[b]).sum())
+    np.testing.assert_allclose(result['group_scores'], group_scores)
+    np.testing.assert_allclose(result['objective'], sum(group_scores))
+
+
+@pytest.mark.parametrize('n_students, group_size', [
+    (200, 2), (199, 2), (200, 3), (198, 4), (6, 4), (7, 4), (5, 3), (3, 4), (2, 2), (1, 2),
+])
+def test_every_student_is_grouped_once(system, n_students, group_size):
+    cohort = list(range(n_students))
+    result = pair_cohort(system, student_ids=None if n_students == 200 else cohort, group_size=group_size)
+    check_groups(system, result, cohort, group_size)
+
+
+def test_local_search_does_not_lower_the_objective(system):
+    # 200 students divide evenly, so no leftovers join the groups afterwards
+    result = pair_cohort(system, group_size=2)
+    assert result['objective'] >= result['greedy_objective'] - 1e-9
+
+
+def test_invalid_cohorts_are_rejected(system):
+    with pytest.raises(ValueError):
+        pair_cohort(system, student_ids=[0, 1, 10_000])
+    with pytest.raises(ValueError):
+        pair_cohort(system, group_size=1)
@@ -0,0 +1,117 @@
+# tests/test_penalties.py
+import numpy as np
+import pytest
+
+from src.data.student_store import StudentStore
+from src.models.matching_system import StudentMatchingSystem
+from src.models.penalties import PenaltyEngine
+
+WEIGHTS = StudentMatchingSystem().weights
+
+
+def reference_penalties(population, student_data, weights=WEIGHTS):
+    """The original row-by-row penalty formula, kept as the specification"""
+    penalties = np.zeros(len(population))
+    availability_cols = [col for col in population.columns if col.startswith('Available_Time_')]
+    for idx, row in population.iterrows():
+        age_importance = weights.get(student_data['Preference_Similar_Age'], 0.5)
+        if age_importance > 0:
+            age_diff = abs(student_data['Child_Age'] - row['Child_Age'])
+            penalties[idx] += age_diff / 10.0 * age_importance * 0.5
+
+        gender_importance = weights.get(student_data['Preference_Same_Gender'], 0.5)
+        if gender_importance > 0:
+            if student_data['Child_Gender'] != row['Child_Gender']:
+                if student_data['Child_Gender'] in ['Male', 'Female'] and row['Child_Gender'] in ['Male', 'Female']:
+                    penalties[idx] += 0.3 * gender_importance
+                elif 'Prefer not to say' in [student_data['Child_Gender'], row['Child_Gender']]:
+                    penalties[idx] += 0.1 * gender_importance
+                else:
+                    penalties[idx] += 0.2 * gender_importance
+
+        time_importance = weights.get(student_data['Preference_Overlapping_Time'], 0.5)
+        if time_importance > 0:
+            student1_available = sum(1 for col in availability_cols if student_data[col] == 'Available')
+            student2_available = sum(1 for col in availability_cols if row[col] == 'Available')
+            overlapping_slots = sum(1 for col in availability_cols
+                                    if student_data[col] == 'Available' and row[col] == 'Available')
+            if student1_available == 0 or student2_available == 0:
+                penalties[idx] += 0.5 * time_importance
+            else:
+                overlap_ratio = overlapping_slots / min(student1_available, student2_available)
+                penalties[idx] += (1 - overlap_ratio) * time_importance * 0.3
+            if student_data['Child_Region'] != row['Child_Region']:
+                penalties[idx] += 0.15 * time_importance
+    return penalties
+
+
+@pytest.fixture(scope='module')
+def population(roster):
+    population = roster.iloc[:200].copy()
+    availability_cols = [col for col in population.columns if col.startswith('Available_Time_')]
+    # Some students with no availability at all
+    population.loc[population.index[::17], availability_cols] = 'Not available'
+    return population
+
+
+@pytest.fixture(scope='module')
+def engine(population):
+    return PenaltyEngine(WEIGHTS).fit(StudentStore().fit(population))
+
+
+@pytest.fixture(scope='module')
+def queries(roster, population):
+    queries = roster.iloc[200:260].to_dict('records')
+    availability_cols = [col for col in population.columns if col.startswith('Available_Time_')]
+    for i, query in enumerate(queries):
+        query['Child_Age'] = int(query['Child_Age'])
+        if i % 5 == 0:
+            query.update({col: 'Not available' for col in availability_cols})
+        if i % 7 == 1:
+            query['Child_Gender'] = 'Nonbinary'
+        if i % 7 == 2:
+            query['Child_Region'] = 'Pacific Islands'
+        if i % 11 == 3:
+            query['Preference_Same_Gender'] = 'Somewhat Important'
+    # Students from the population itself, including the unavailable ones
+    queries += [dict(record, Child_Age=int(record['Child_Age'])) for record in population.iloc[:40].to_dict('records')]
+    return queries
+
+
+def test_calculate_matches_reference(engine, population, queries):
+    for query in queries:
+        np.testing.assert_allclose(engine.calculate(query), reference_penalties(population, query),
+                                   rtol=0, atol=1e-12)
+
+
+def test_calculate_subset_and_batch_match_reference(engine, population, queries):
+    ids = np.arange(0, len(population), 3)
+    expected = np.stack([reference_penalties(population, query) for query in queries])
+    np.testing.assert_allclose(engine.calculate_batch(queries), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(engine.calculate_batch(queries, ids=ids), expected[:, ids], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(engine.calculate(queries[3], ids=ids), expected[3, ids], rtol=0, atol=1e-12)
+
+
+def test_calculate_pairs_matches_reference(engine, population):
+    rng = np.random.default_rng(0)
+    query_ids = rng.integers(0, len(population), 500)
+    target_ids = rng.integers(0, len(population), 500)
+    records = population.to_dict('records')
+    expected = [reference_penalties(population.iloc[[target]].reset_index(drop=True), records[query])[0]
+                for query, target in zip(query_ids, target_ids)]
+    np.testing.assert_allclose(engine.calculate_pairs(query_ids, target_ids), expected, rtol=0, atol=1e-12)
+
+
+def test_unseen_values_are_exercised(engine, population, queries):
+    assert 'Nonbinary' not in engine.gender_vocab
+    assert 'Pacific Islands' not in engine.region_vocab
+    assert (engine.availability_counts == 0).any()
+    assert any(all(query[col] != 'Available' for col in engine.availability_cols) for query in queries)
+
+
+def test_calculate_per_query_candidates_matches_reference(engine, population, queries):
+    rng = np.random.default_rng(1)
+    ids = rng.integers(0, len(population), (len(queries), 30))
+    expected = np.stack([reference_penalties(population, query)[row] for query, row in zip(queries, ids)])
+    np.testing.assert_allclose(engine.calculate_encoded(engine.encode_queries(queries), ids=ids), expected,
+                               rtol=0, atol=1e-12)
@@ -0,0 +1,46 @@
+# tests/test_preprocessing.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.preprocessing import DataPreprocessor
+
+
+@pytest.fixture(scope='module')
+def preprocessor(roster):
+    preprocessor = DataPreprocessor()
+    preprocessor.fit(roster.iloc[:300])
+    return preprocessor
+
+
+def dataframe_path(preprocessor, records):
+    """The pandas preprocessing path, as the feature plan's specification"""
+    processed = preprocessor.preprocess_data(pd.DataFrame(records))
+    return processed[preprocessor.feature_plan.columns].values.astype(np.float32)
+
+
+def test_feature_plan_matches_dataframe_path(preprocessor, roster):
+    records = roster.to_dict('records')
+    expected = dataframe_path(preprocessor, records)
+    for record, row in zip(records, expected):
+        np.testing.assert_array_equal(preprocessor.transform_record(record), row)
+    np.testing.assert_array_equal(preprocessor.feature_plan.encode_many(records), expected)
+
+
+def test_unknown_categories_encode_as_zeros(preprocessor, roster):
+    unknown = {
+        'Child_Gender': 'Nonbinary',
+        'Child_Region': 'Pacific Islands',
+        'Preference_Same_Gender': 'Somewhat Important',
+    }
+    records = [dict(record, **{column: value}) for record in roster.iloc[:20].to_dict('records')
+               for column, value in unknown.items()]
+    expected = dataframe_path(preprocessor, records)
+
+    columns = preprocessor.feature_plan.columns
+    for record, row in zip(records, expected):
+        encoded = preprocessor.transform_record(record)
+        np.testing.assert_array_equal(encoded, row)
+        column = next(column for column in unknown if record[column] == unknown[column])
+        one_hot = [i for i, name in enumerate(columns) if name.startswith(column + '_')]
+        assert one_hot and not encoded[one_hot].any()
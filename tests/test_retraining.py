@@ -0,0 +1,31 @@
+# tests/test_retraining.py
+import os
+import time
+
+from src.models.matching_system import StudentMatchingSystem
+from src.models.retraining import ModelHandle, RetrainingScheduler
+
+
+def test_retrain_keeps_config_and_removes_work_dir(roster, tmp_path):
+    system = StudentMatchingSystem(encoding_dim=8, index_backend='ivf', index_params={'n_lists': 4},
+                                   candidate_pool=100, encoder_precision='float16',
+                                   compaction_threshold=0.5)
+    system.fit(roster.iloc[:400], epochs=1, batch_size=32)
+    handle = ModelHandle(system)
+    scheduler = RetrainingScheduler(handle, str(tmp_path), fit_kwargs={'epochs': 1})
+    try:
+        scheduler.request_retrain().result(timeout=300)
+        deadline = time.monotonic() + 60
+        while scheduler.queue_depth and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        scheduler.shutdown()
+
+    assert scheduler.metrics['retrains_completed'] == 1, scheduler.metrics['last_error']
+    retrained = handle.system
+    assert retrained is not system
+    assert (retrained.encoding_dim, retrained.index_backend, retrained.index_params,
+            retrained.candidate_pool, retrained.encoder_precision, retrained.compaction_threshold) == \
+        (8, 'ivf', {'n_lists': 4}, 100, 'float16', 0.5)
+    assert retrained.encoded_features.shape == (400, 8)
+    assert os.listdir(tmp_path) == []